@@ -0,0 +1,110 @@
+# bench/bench_dcl.py
+# Bandingkan counter / filter / detail route DCL: loop per row (list posisi),
+# fungsi publik dengan list row mentah, dan operasi kolom di DclTable.
+#   python -m bench.bench_dcl [--rows 2000] [--repeat 200]
+
+import argparse
+import random
+import time
+
+from src.dcl_monitoring_json import (
+    DclTable,
+    count_by_dock,
+    count_late,
+    count_not_arrived,
+    find_route_row,
+    get_routes_by_status,
+    normalize_status,
+    summarize_dcl,
+)
+
+STATUSES = ["arrived", "advanced", "late", "delay", "waiting"]
+
+
+def make_rows(n, seed=0):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        hour, minute = rnd.randrange(6, 22), rnd.randrange(60)
+        status = rnd.choice(STATUSES)
+        actual = "" if status in ("delay", "waiting") else f"{hour:02d}:{(minute + 7) % 60:02d}"
+        rows.append([
+            rnd.choice(["43", "44", "45"]), str(i % 4 + 1), f"R{i // 4:04d}-{i % 4}",
+            f"SUP {i % 37}", "", "", f"{hour:02d}:{minute:02d}", actual, status.title(),
+        ])
+    return rows
+
+
+# implementasi lama (loop Python per row, akses posisi)
+def legacy_count(rows, status):
+    return sum(1 for r in rows if normalize_status(r[8]) == status)
+
+
+def legacy_count_by_dock(rows, dock):
+    return sum(1 for r in rows if str(r[0]).strip() == str(dock).strip())
+
+
+def legacy_routes_by_status(rows, status):
+    return [str(r[2]) for r in rows if normalize_status(r[8]) == status]
+
+
+def legacy_find_route_row(rows, route_name):
+    route_name = route_name.strip().lower()
+    for r in rows:
+        if str(r[2]).strip().lower() == route_name:
+            return r
+    return None
+
+
+def legacy_summary(rows):
+    counts = {s: legacy_count(rows, s) for s in STATUSES}
+    counts["not_arrived"] = counts["delay"] + counts["waiting"]
+    return counts
+
+
+def time_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    rows = make_rows(args.rows)
+    table = DclTable.from_rows(rows)
+    last_route = rows[-1][2]
+
+    build_ms = time_ms(lambda: DclTable.from_rows(rows), max(1, args.repeat // 10))
+    # (nama, loop lama, fungsi publik dipanggil dengan DclTable / list row mentah)
+    cases = [
+        ("count late", lambda: legacy_count(rows, "late"), lambda t: count_late(t)),
+        ("count belum tiba",
+         lambda: legacy_count(rows, "delay") + legacy_count(rows, "waiting"),
+         lambda t: count_not_arrived(t)),
+        ("count dock", lambda: legacy_count_by_dock(rows, "44"), lambda t: count_by_dock(t, "44")),
+        ("route by status",
+         lambda: legacy_routes_by_status(rows, "delay"),
+         lambda t: get_routes_by_status(t, "delay")),
+        ("detail route",
+         lambda: legacy_find_route_row(rows, last_route),
+         lambda t: find_route_row(t, last_route)),
+        ("summary", lambda: legacy_summary(rows), lambda t: summarize_dcl(t)),
+    ]
+
+    print(f"rows         : {args.rows}")
+    print(f"build table  : {build_ms:.3f} ms (sekali per refresh)")
+    print(f"{'operasi':<18}{'loop':>10}{'list':>10}{'table':>10}{'speedup':>10}")
+    for name, legacy, api in cases:
+        old_ms = time_ms(legacy, args.repeat)
+        list_ms = time_ms(lambda: api(rows), args.repeat)
+        new_ms = time_ms(lambda: api(table), args.repeat)
+        print(f"{name:<18}{old_ms:>8.3f}ms{list_ms:>8.3f}ms{new_ms:>8.3f}ms{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# bench/bench_history.py
+# Latency query history store: satu hari snapshot tiap 30 detik.
+#   python -m bench.bench_history [--entities 2000] [--hours 24] [--change 0.05]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.history_store import HistoryStore
+
+TARGET_MS = 5.0   # target "query dalam hitungan milidetik"
+
+
+def fill(store, entities, snapshots, change, start, seed=0):
+    rnd = random.Random(seed)
+    values = {f"K{i:04d}": rnd.randrange(-50, 500) for i in range(entities)}
+    for n in range(snapshots):
+        for key in values:
+            if rnd.random() < change:
+                values[key] += rnd.randrange(-20, 21)
+        store.record("stock", {k: {"stockoverall": v} for k, v in values.items()}, start + n * 30)
+    return list(values)
+
+
+def time_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entities", type=int, default=2000)
+    ap.add_argument("--hours", type=float, default=24)
+    ap.add_argument("--change", type=float, default=0.05, help="peluang nilai berubah per snapshot")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    snapshots = int(args.hours * 3600 / 30)
+    start = 1_700_000_000.0
+    end = start + snapshots * 30
+    mid = start + (end - start) / 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"), retention=10 * 24 * 3600)
+        fill_start = time.perf_counter()
+        keys = fill(store, args.entities, snapshots, args.change, start)
+        fill_s = time.perf_counter() - fill_start
+
+        rows = store._connect().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        key = keys[len(keys) // 2]
+        cases = [
+            ("value_at", lambda: store.value_at("stock", key, "stockoverall", mid)),
+            ("series 1 jam", lambda: store.series("stock", key, "stockoverall", mid, mid + 3600)),
+            ("first_value", lambda: store.first_value("stock", key, "stockoverall", mid, end)),
+            ("snapshot_at", lambda: store.snapshot_at("stock", "stockoverall", mid)),
+        ]
+
+        print(f"entities     : {args.entities} x {snapshots} snapshot ({rows} delta, isi {fill_s:.1f} s)")
+        for name, fn in cases:
+            ms = time_ms(fn, args.repeat)
+            flag = "OK" if ms <= TARGET_MS else f"> target {TARGET_MS:g} ms"
+            print(f"{name:<13}: {ms:.3f} ms  {flag}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench/bench_intent.py
+# Bandingkan akurasi & latency intent classifier vs keyword rule, plus
+# detect_intent (rule lalu classifier) yang benar-benar dipakai, per ambang confidence.
+#   python -m bench.bench_intent [--backend sklearn|centroid] [--repeat 200]
+
+import argparse
+import time
+
+from src import intent_classifier
+from src.intent_classifier import INTENT_DATASET, load_dataset, make_backend, OTHER_INTENT
+from src.nlp_logic import detect_intent, rule_intent, CRITICAL_KEYWORDS
+
+THRESHOLDS = (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+def rule_baseline(txt):
+    intent = rule_intent(txt)
+    if intent:
+        return intent
+    if any(x in txt for x in CRITICAL_KEYWORDS):
+        return "critical_stock"
+    return OTHER_INTENT
+
+
+def shipped(txt):
+    """Urutan seperti parse_query: detect_intent, lalu keyword critical."""
+    intent = detect_intent(txt)
+    if intent:
+        return intent
+    if any(x in txt for x in CRITICAL_KEYWORDS):
+        return "critical_stock"
+    return OTHER_INTENT
+
+
+def split(texts, labels, every=4):
+    """Setiap sampel ke-<every> jadi data uji (deterministik)."""
+    train = [(t, l) for i, (t, l) in enumerate(zip(texts, labels)) if i % every]
+    test = [(t, l) for i, (t, l) in enumerate(zip(texts, labels)) if not i % every]
+    return train, test
+
+
+def accuracy(pred, gold):
+    return sum(p == g for p, g in zip(pred, gold)) / len(gold)
+
+
+def time_per_query(fn, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for t in texts:
+            fn(t)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default="sklearn")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    texts, labels = load_dataset(INTENT_DATASET)
+    train, test = split(texts, labels)
+    test_texts = [t for t, _ in test]
+    gold = [l for _, l in test]
+
+    clf = make_backend(args.backend).fit([t for t, _ in train], [l for _, l in train])
+
+    batch_start = time.perf_counter()
+    for _ in range(args.repeat):
+        pred = [p for p, _ in clf.predict(test_texts)]
+    batch_ms = (time.perf_counter() - batch_start) / (args.repeat * len(test_texts)) * 1e3
+
+    single_ms = time_per_query(lambda t: clf.predict([t]), test_texts, max(1, args.repeat // 10))
+    rule_ms = time_per_query(rule_baseline, test_texts, args.repeat)
+    rule_pred = [rule_baseline(t) for t in test_texts]
+
+    print(f"dataset      : {len(texts)} kalimat, {len(set(labels))} intent, uji {len(test)}")
+    print(f"classifier   : {clf.name}")
+    print(f"  akurasi    : {accuracy(pred, gold):.1%}")
+    print(f"  batch      : {batch_ms:.4f} ms/query")
+    print(f"  single     : {single_ms:.4f} ms/query")
+    print(f"keyword rule :")
+    print(f"  akurasi    : {accuracy(rule_pred, gold):.1%}")
+    print(f"  latency    : {rule_ms:.4f} ms/query")
+
+    # detect_intent dengan model hasil split (bukan model di data/ yang ikut melihat data uji)
+    intent_classifier._classifier.update(model=clf, loaded=True)
+    current = intent_classifier.MIN_CONFIDENCE.get(clf.name)
+    print(f"detect_intent (rule lalu {clf.name}, ambang sekarang {current}):")
+    for threshold in THRESHOLDS:
+        intent_classifier.MIN_CONFIDENCE[clf.name] = threshold
+        acc = accuracy([shipped(t) for t in test_texts], gold)
+        print(f"  >= {threshold:.1f}     : {acc:.1%}{'  <- dipakai' if threshold == current else ''}")
+    intent_classifier.MIN_CONFIDENCE[clf.name] = current
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench/bench_resolver.py
+# Latency fuzzy lookup kanban / route (resolve) per pertanyaan.
+#   python -m bench.bench_resolver [--kanbans 2000] [--routes 500] [--repeat 500]
+
+import argparse
+import random
+import time
+
+from src.entity_resolver import NgramIndex, candidate_spans, resolve
+
+TARGET_MS = 1.0   # target "di bawah satu milidetik" per pertanyaan
+
+QUERIES = [
+    ("kanban", "berapa stok kanban 50 11 sekarang ya"),
+    ("kanban", "stok kanban 5011"),
+    ("kanban", "stok 937 f masih berapa"),
+    ("kanban", "stoknya turun berapa sejak jam 9"),
+    ("route", "info rute abc 0 1"),
+    ("route", "detail route abd-01 statusnya apa"),
+]
+
+
+def make_kanbans(n, seed=0):
+    rnd = random.Random(seed)
+    chars = "0123456789ABCDEF"
+    codes = {"5011", "937F"}
+    while len(codes) < n:
+        codes.add(rnd.choice("123456789") + "".join(rnd.choice(chars) for _ in range(3)))
+    return sorted(codes)
+
+
+def make_routes(n):
+    routes = ["ABC-01"]
+    for i in range(n - 1):
+        prefix = "".join(chr(65 + i // 26 ** k % 26) for k in range(3))
+        routes.append(f"{prefix}-{i % 9 + 1:02d}")
+    return routes
+
+
+def time_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--kanbans", type=int, default=2000)
+    ap.add_argument("--routes", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=500)
+    args = ap.parse_args()
+
+    indexes = {
+        "kanban": NgramIndex(make_kanbans(args.kanbans)),
+        "route": NgramIndex(make_routes(args.routes)),
+    }
+
+    print(f"index        : {args.kanbans} kanban, {args.routes} route")
+    for kind, text in QUERIES:
+        index = indexes[kind]
+        ms = time_ms(lambda: resolve(index, text), args.repeat)
+        flag = "OK" if ms <= TARGET_MS else f"> target {TARGET_MS:g} ms"
+        top = ", ".join(f"{name} {score:.2f}" for name, score in resolve(index, text)[:3]) or "-"
+        print(f"{ms:.3f} ms  {flag:<6} {text!r}")
+        print(f"           span {candidate_spans(text)} -> {top}")
+
+
+if __name__ == "__main__":
+    main()
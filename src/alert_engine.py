@@ -0,0 +1,234 @@
+# src/alert_engine.py
+
+import json
+import operator
+import os
+import re
+import threading
+
+import pandas as pd
+
+ALERT_RULES_FILE = "data/alert_rules.json"
+
+OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_RULE_RE = re.compile(r"^\s*(\w+)\s*(<=|>=|==|!=|<|>)\s*(.+?)\s*$")
+
+
+class Rule:
+    """
+    Satu aturan watch, misal: stock.stockspsminutes < 30 untuk kanban tertentu.
+    entities=None berarti berlaku untuk semua kanban / route.
+    """
+
+    def __init__(self, name, kind, column, op, value, entities=None, message=None):
+        if op not in OPS:
+            raise ValueError(f"Operator tidak dikenal: {op}")
+        self.name = name
+        self.kind = kind
+        self.column = column.lower()
+        self.op = op
+        self.value = value
+        self.entities = {str(e).strip().upper() for e in entities} if entities else None
+        self.message = message
+
+    @classmethod
+    def parse(cls, name, kind, expr, entities=None, message=None):
+        """Rule.parse("low_sps", "stock", "stockspsminutes < 30", ["5011"])"""
+        m = _RULE_RE.match(expr)
+        if not m:
+            raise ValueError(f"Format rule tidak valid: {expr}")
+        column, op, raw = m.groups()
+        raw = raw.strip("'\"")
+        try:
+            value = float(raw)
+        except ValueError:
+            value = raw.lower()
+        return cls(name, kind, column, op, value, entities, message)
+
+    @property
+    def numeric(self):
+        return isinstance(self.value, (int, float))
+
+    def check(self, value):
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return False
+        try:
+            return OPS[self.op](value, self.value)
+        except TypeError:
+            return False
+
+    def format(self, entity, value):
+        if self.message:
+            return self.message.format(entity=entity, value=value, column=self.column)
+        return f"⚠️ {self.kind.upper()} {entity}: {self.column} {self.op} {self.value} (sekarang {value})."
+
+
+class AlertEngine:
+    """
+    Rule di-index per (kind, kolom) lalu per entity. Setiap refresh hanya
+    baris yang nilainya berubah dibanding snapshot sebelumnya yang dievaluasi.
+    Alert dikirim sekali saat kondisi berubah dari False ke True.
+
+    evaluate() hanya mengantrekan alert; loader memanggil flush() setelah
+    lock data dilepas, sehingga listener (GUI, TTS) tidak berjalan di dalam
+    lock dan menerima semua alert satu refresh sekaligus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules = {}       # (kind, column) -> {"*": [rule], entity: [rule]}
+        self._last = {}        # (kind, column) -> Series nilai terakhir
+        self._active = set()   # (rule.name, entity) yang sedang aktif
+        self._pending = []     # alert yang belum dikirim ke listener
+        self._listeners = []
+
+    # RULES
+    def add_rule(self, rule):
+        with self._lock:
+            by_entity = self._rules.setdefault((rule.kind, rule.column), {})
+            for key in (rule.entities or {"*"}):
+                by_entity.setdefault(key, []).append(rule)
+            # kolom baru -> evaluasi penuh pada refresh berikutnya
+            self._last.pop((rule.kind, rule.column), None)
+
+    def columns(self, kind):
+        return [col for (k, col) in self._rules if k == kind]
+
+    def load_rules(self, path=ALERT_RULES_FILE):
+        """
+        File JSON berisi list rule:
+        [{"name": "low_sps", "kind": "stock", "rule": "stockspsminutes < 30",
+          "entities": ["5011", "937F"], "message": "..."}]
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        for item in items:
+            self.add_rule(Rule.parse(
+                item["name"], item["kind"], item["rule"],
+                item.get("entities"), item.get("message"),
+            ))
+        return len(items)
+
+    # LISTENERS
+    def subscribe(self, callback):
+        """callback(alerts): list alert baru dari satu refresh."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # EVALUATION
+    def evaluate(self, kind, frame, notify=True):
+        """
+        frame: DataFrame ber-index entity (kanban / route) dengan kolom yang diawasi.
+        Mengembalikan list alert baru; notify=True juga mengantrekannya untuk flush().
+        """
+        alerts = []
+        with self._lock:
+            for (k, column), by_entity in self._rules.items():
+                if k != kind or column not in frame.columns:
+                    continue
+
+                rules = [r for rs in by_entity.values() for r in rs]
+                new = frame[column]
+                if any(r.numeric for r in rules):
+                    new = pd.to_numeric(new, errors="coerce")
+                elif new.dtype == object:
+                    new = new.astype(str).str.strip().str.lower()
+
+                old = self._last.get((kind, column))
+                self._last[(kind, column)] = new
+                first = old is None
+
+                if first:
+                    changed = new.index
+                else:
+                    prev = old.reindex(new.index)
+                    same = (new == prev) | (new.isna() & prev.isna())
+                    changed = new.index[~same.to_numpy()]
+
+                wildcard = by_entity.get("*", [])
+                if not wildcard:
+                    changed = changed.intersection(list(by_entity))
+
+                for entity in changed:
+                    value = new.at[entity]
+                    for rule in wildcard + by_entity.get(entity, []):
+                        key = (rule.name, entity)
+                        if rule.check(value):
+                            if key not in self._active:
+                                self._active.add(key)
+                                # snapshot pertama hanya mengisi state, tidak dikirim
+                                if not first:
+                                    alerts.append({
+                                        "rule": rule.name,
+                                        "kind": kind,
+                                        "entity": entity,
+                                        "column": column,
+                                        "value": value,
+                                        "message": rule.format(entity, value),
+                                    })
+                        else:
+                            self._active.discard(key)
+
+            if notify:
+                self._pending.extend(alerts)
+        return alerts
+
+    def flush(self):
+        """Kirim alert yang mengantre ke listener dalam satu batch."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return []
+        for callback in list(self._listeners):
+            try:
+                callback(batch)
+            except Exception:
+                pass
+        return batch
+
+
+alerts = AlertEngine()
+alerts.add_rule(Rule(
+    "stok_minus", "stock", "stockoverall", "<", 0,
+    message="⚠️ Stok Kanban {entity} minus ({value:g} pcs).",
+))
+alerts.add_rule(Rule(
+    "route_delay", "dcl", "status", "==", "delay",
+    message="⚠️ Route {entity} masuk status Delay.",
+))
+try:
+    alerts.load_rules()
+except Exception as e:
+    print(f"[❌] Gagal memuat alert rules: {e}")
+
+
+def evaluate_snapshot(kind, frame):
+    """
+    Dipanggil loader setiap refresh (boleh di dalam lock); alert baru
+    mengantre sampai flush_alerts(). Error rule tidak boleh mengganggu query.
+    """
+    try:
+        return alerts.evaluate(kind, frame)
+    except Exception:
+        return []
+
+
+def flush_alerts():
+    """Dipanggil loader setelah lock data dilepas."""
+    try:
+        return alerts.flush()
+    except Exception:
+        return []
@@ -1,34 +1,224 @@
 # src/dcl_monitoring_json.py
 
+import threading
 import requests
 import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.history_store import record_snapshot
+from src.alert_engine import evaluate_snapshot, flush_alerts
+from src.entity_resolver import NgramIndex
+from src.feed_guard import get_breaker, staleness_note
+from src import shared_snapshot
+from src.snapshot import Snapshot, pinned
 
 DCL_URL = "http://10.64.6.27/legion/dcl_monitoring_dock43.php"
 DCL_CACHE_TTL = 30  # seconds
 
-_dcl_cache = {"rows": None, "ts": 0}
+# posisi kolom pada row dcl_monitoring_dock43.php
+COL_DOCK = 0
+COL_ROUTE = 2
+COL_SCHEDULED_ARRIVAL = 6
+COL_ACTUAL_ARRIVAL = 7
+COL_STATUS = 8
+
+# posisi -> nama kolom di DCL frame (lihat build_dcl_frame)
+DCL_FIELDS = {
+    COL_DOCK: "dock",
+    COL_ROUTE: "route",
+    COL_SCHEDULED_ARRIVAL: "scheduled_arrival",
+    COL_ACTUAL_ARRIVAL: "actual_arrival",
+    COL_STATUS: "raw_status",
+}
+
+# snapshot aktif (src/snapshot.py), diganti utuh setiap refresh
+_dcl_snapshot = None
+# shared_meta: meta shared snapshot yang dipakai window pembaca (None = fetch sendiri)
+_dcl_state = {"attempt_ts": 0, "shared_meta": None}   # bookkeeping loader, hanya diubah di bawah _dcl_lock
+_dcl_lock = threading.Lock()
+
+
+def get_dcl_snapshot():
+    """Snapshot yang di-pin thread ini (lihat process_query), atau snapshot terbaru."""
+    return pinned("dcl") or _dcl_snapshot
+
+
+# LOAD DCL JSON (with caching + single-flight + circuit breaker)
+# Thread yang menemukan cache basi menunggu lock; jika selama menunggu ada
+# fetch thread lain yang selesai, hasil fetch itu yang dipakai (tidak ada
+# request kedua ke server untuk refresh window yang sama).
+# Jika server sedang down (breaker terbuka), snapshot terakhir langsung
+# dikembalikan dengan "stale": True tanpa menunggu timeout.
+def _last_good(stale=True, snap=None):
+    snap = snap or _dcl_snapshot
+    if snap is None:
+        return None
+    # rows None jika snapshot berasal dari shared snapshot (lihat _load_shared_dcl)
+    return {"rows": snap.data, "stale": stale}
+
+
+def publish_dcl_rows(rows, ts=None, snapshot_id=None):
+    """Bangun snapshot DCL baru dari row server lalu pasang sebagai snapshot aktif."""
+    ts = time.time() if ts is None else ts
+    return publish_dcl_table(DclTable.from_rows(rows, datetime.fromtimestamp(ts)), ts, snapshot_id, rows)
+
+
+def publish_dcl_table(table, ts, snapshot_id=None, rows=None):
+    """
+    Pasang DclTable beserta index turunannya sebagai snapshot aktif.
+    rows: payload asli dari server, None jika tabel berasal dari shared snapshot.
+    """
+    global _dcl_snapshot
+    previous = _dcl_snapshot
+    _dcl_snapshot = Snapshot(
+        kind="dcl",
+        data=rows,
+        ts=ts,
+        version=previous.version + 1 if previous else 1,
+        snapshot_id=snapshot_id or f"dcl-{int(ts * 1000)}",
+        indexes={
+            "table": table,
+            "route_index": NgramIndex(table.names["route"]),
+            "timing": build_timing(table),
+        },
+    )
+    return _dcl_snapshot
+
+
+# SHARED SNAPSHOT (beberapa window di satu PC, lihat src/shared_snapshot.py)
+# Yang dibagi adalah DclTable hasil parse (kode category kolom teks + jadwal /
+# aktual datetime64), jadi window lain memakai kode dari mmap tanpa parse ulang.
+def share_dcl_table(snap):
+    table = snap.index("table")
+    columns = {
+        name: pd.Categorical.from_codes(table.codes[name], categories=table.names[name])
+        for name in TABLE_TEXT_COLUMNS
+    }
+    columns["scheduled"] = table.scheduled
+    columns["actual"] = table.actual
+    # ts = fetch terakhir yang berhasil; feed_down diperbarui publisher saat fetch gagal
+    shared_snapshot.publish("dcl", columns, {"snapshot_id": snap.snapshot_id, "ts": snap.ts, "feed_down": False})
+
+
+def _load_shared_dcl():
+    """Pasang snapshot dari publisher jika ada yang baru. True jika cache berisi snapshot shared."""
+    current = _dcl_snapshot
+    shared = shared_snapshot.read("dcl", current.snapshot_id if current else None)
+    if shared is None:
+        if current is None or not shared_snapshot.publisher_alive():
+            return False
+        # snapshot sama, tapi kondisi feed publisher bisa berubah
+        meta = shared_snapshot.read_meta("dcl")
+    else:
+        meta, columns = shared
+        table = DclTable.from_columns(columns)
+        publish_dcl_table(table, meta["ts"], meta["snapshot_id"])
+        evaluate_snapshot("dcl", pd.DataFrame.from_dict(history_snapshot(table), orient="index"))
+    _dcl_state["shared_meta"] = meta
+    return True
+
+
+def _feed_down():
+    """Feed DCL down? Window pembaca memakai kondisi breaker publisher (meta shared snapshot)."""
+    meta = _dcl_state["shared_meta"]
+    if meta is not None:
+        return bool(meta.get("feed_down"))
+    return get_breaker(DCL_URL).is_down()
 
 
-# LOAD DCL JSON (with caching)
 def load_dcl_json():
-    global _dcl_cache
     now = time.time()
 
-    if _dcl_cache["rows"] is not None and (now - _dcl_cache["ts"]) < DCL_CACHE_TTL:
-        return {"rows": _dcl_cache["rows"]}
-
+    snap = pinned("dcl")
+    if snap is not None:
+        # di tengah satu jawaban: jangan refresh, pakai snapshot yang di-pin
+        return _last_good(stale=_feed_down(), snap=snap)
+
+    snap = _dcl_snapshot
+    if snap is not None and (now - snap.ts) < DCL_CACHE_TTL:
+        return _last_good(stale=False, snap=snap)
+
+    publisher = not shared_snapshot.SHARED_SNAPSHOT_ENABLED or shared_snapshot.acquire_publisher(now)
+    if not publisher:
+        # window lain yang fetch; cukup baca snapshot miliknya
+        try:
+            with _dcl_lock:
+                if _load_shared_dcl():
+                    return _last_good(stale=_feed_down() or (now - _dcl_snapshot.ts) > 2 * DCL_CACHE_TTL)
+        finally:
+            flush_alerts()
+        # publisher belum menulis snapshot: fetch sendiri, tapi tidak di-share
+        # supaya pointer milik publisher tidak tertimpa
+
+    breaker = get_breaker(DCL_URL)
+    if not breaker.allow():
+        return _last_good()
+
+    # alert dikirim setelah _dcl_lock dilepas
     try:
-        r = requests.get(DCL_URL, timeout=5)
-        r.raise_for_status()
-        payload = r.json()
+        with _dcl_lock:
+            if _dcl_state["attempt_ts"] >= now:
+                return _last_good(stale=breaker.is_down())
 
-        rows = payload.get("data", [])
-        _dcl_cache["rows"] = rows
-        _dcl_cache["ts"] = now
-        return {"rows": rows}
+            now = time.time()
+            _dcl_state["shared_meta"] = None   # fetch sendiri: breaker window ini yang berlaku
+            try:
+                r = requests.get(DCL_URL, timeout=5)
+                r.raise_for_status()
+                payload = r.json()
 
-    except Exception:
-        return None
+                rows = payload.get("data", [])
+                snap = publish_dcl_rows(rows, now)
+                breaker.record_success()
+                if shared_snapshot.SHARED_SNAPSHOT_ENABLED and publisher:
+                    share_dcl_table(snap)
+                snapshot = history_snapshot(snap.index("table"))
+                record_snapshot("dcl", snapshot, now)
+                evaluate_snapshot("dcl", pd.DataFrame.from_dict(snapshot, orient="index"))
+                return _last_good(stale=False, snap=snap)
+
+            except Exception as e:
+                breaker.record_failure(e)
+                if shared_snapshot.SHARED_SNAPSHOT_ENABLED and publisher:
+                    # window pembaca tetap memakai snapshot terakhir, tapi dengan catatan staleness
+                    shared_snapshot.update_meta("dcl", feed_down=True)
+                return _last_good()
+
+            finally:
+                _dcl_state["attempt_ts"] = time.time()
+    finally:
+        flush_alerts()
+
+
+def dcl_staleness_note():
+    snap = get_dcl_snapshot()
+    return staleness_note("DCL", _feed_down(), snap.ts if snap else 0)
+
+
+# VERSION — naik setiap data baru masuk (dipakai memo jawaban)
+def get_dcl_version():
+    snap = get_dcl_snapshot()
+    return snap.version if snap else 0
+
+
+def dcl_payload(snap):
+    """Row DCL untuk query log; snapshot dari shared snapshot tidak membawa row asli."""
+    return snap.data if snap.data is not None else snap.index("table").to_rows()
+
+
+def get_dcl_snapshot_id():
+    snap = get_dcl_snapshot()
+    return snap.snapshot_id if snap else None
+
+
+# ROUTE INDEX (fuzzy lookup, dibangun ulang tiap snapshot)
+def get_route_index():
+    snap = get_dcl_snapshot()
+    return snap.index("route_index") if snap else None
 
 
 # STATUS MAPPING (FINAL)
@@ -52,71 +242,383 @@ def normalize_status(st):
     return st
 
 
-# COUNTERS
-def count_arrived(rows):
-    return sum(1 for r in rows if normalize_status(r[8]) == "arrived")
+# DCL TABLE
+# Row JSON dari server hanya list posisi; sekali per refresh diubah menjadi
+# DataFrame berkolom nama (build_dcl_frame):
+#   dock               kode dock (category)
+#   route              nama route (strip)
+#   route_key          nama route lower-case, untuk lookup detail
+#   raw_status         status asli dari server
+#   status             status hasil normalize_status (category)
+#   scheduled_arrival  jadwal datang, teks asli ("" jika kosong)
+#   actual_arrival     aktual datang, teks asli ("" jika kosong)
+#   scheduled, actual  jadwal / aktual sebagai datetime64 (NaT jika kosong)
+def _text(col):
+    return col.astype("string").fillna("").str.strip()
+
+
+def build_dcl_frame(rows, now=None):
+    raw = pd.DataFrame(list(rows), dtype=object).reindex(columns=range(COL_STATUS + 1))
+    frame = pd.DataFrame({name: _text(raw[i]) for i, name in DCL_FIELDS.items()})
+
+    frame["route_key"] = frame["route"].str.lower()
+    frame["status"] = frame["raw_status"].str.lower().astype("category")
+    frame["dock"] = frame["dock"].astype("category")
+    # jadwal dipasang ke tanggal terdekat dari waktu fetch, aktual ke tanggal
+    # terdekat dari jadwalnya (datang 00:05 untuk slot 23:45 = telat 20 menit)
+    now = np.datetime64(now or datetime.now(), "ns")
+    scheduled = parse_arrival(raw[COL_SCHEDULED_ARRIVAL], now)
+    frame["scheduled"] = scheduled
+    frame["actual"] = parse_arrival(
+        raw[COL_ACTUAL_ARRIVAL], np.where(np.isnat(scheduled), now, scheduled)
+    )
+    return frame
+
+
+# Kolom teks DclTable: kode category per row + nama per kode.
+TABLE_TEXT_COLUMNS = (*DCL_FIELDS.values(), "route_key", "status")
+
+
+class DclTable:
+    """
+    DCL per kolom, dibangun sekali per refresh: kolom teks sebagai kode
+    category (array int) + nama, jadwal / aktual sebagai datetime64.
+    Akses kolom pandas ~50 µs per panggilan, lebih mahal dari loop lama untuk
+    data kecil; counter dan filter di bawah cukup membandingkan kode category
+    di array numpy sehingga cepat untuk ukuran data berapa pun. Nilai teks
+    baru di-decode saat dibutuhkan (column / row).
+    """
+
+    def __init__(self, names, codes, scheduled, actual):
+        self.names = names          # kolom -> array object nama category
+        self.codes = codes          # kolom -> array int kode per row
+        self.scheduled = scheduled  # datetime64[ns], NaT jika kosong
+        self.actual = actual
+
+        self.status_names = names["status"].tolist()
+        self.status_codes = codes["status"]
+        self.dock_names = names["dock"].tolist()
+        self.dock_codes = codes["dock"]
+
+        keys, first = np.unique(codes["route_key"], return_index=True)
+        self.route_pos = dict(zip(names["route_key"][keys].tolist(), first.tolist()))
+
+    @classmethod
+    def from_frame(cls, frame):
+        names, codes = {}, {}
+        for name in TABLE_TEXT_COLUMNS:
+            cat = frame[name].astype("category").array
+            names[name] = np.asarray(cat.categories, dtype=object)
+            codes[name] = cat.codes
+        return cls(
+            names, codes,
+            frame["scheduled"].to_numpy(dtype="datetime64[ns]"),
+            frame["actual"].to_numpy(dtype="datetime64[ns]"),
+        )
+
+    @classmethod
+    def from_rows(cls, rows, now=None):
+        return cls.from_frame(build_dcl_frame(rows, now))
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Dari kolom shared snapshot (pd.Categorical + datetime64); kode tidak disalin."""
+        names = {n: np.asarray(columns[n].categories, dtype=object) for n in TABLE_TEXT_COLUMNS}
+        codes = {n: columns[n].codes for n in TABLE_TEXT_COLUMNS}
+        return cls(names, codes, columns["scheduled"], columns["actual"])
+
+    def __len__(self):
+        return len(self.status_codes)
+
+    def column(self, name, index=slice(None)):
+        """Nilai kolom teks untuk index / mask row tertentu (default semua row)."""
+        return self.names[name][self.codes[name][index]]
+
+    def _code_mask(self, names, codes, values):
+        mask = np.zeros(len(codes), dtype=bool)
+        for v in values:
+            if v in names:
+                mask |= codes == names.index(v)
+        return mask
+
+    def status_mask(self, *statuses):
+        return self._code_mask(self.status_names, self.status_codes, statuses)
+
+    def dock_mask(self, dock):
+        return self._code_mask(self.dock_names, self.dock_codes, (dock,))
+
+    def status_counts(self):
+        counts = np.bincount(self.status_codes[self.status_codes >= 0],
+                             minlength=len(self.status_names))
+        return dict(zip(self.status_names, counts.tolist()))
+
+    def row(self, pos):
+        row = {name: self.names[name][codes[pos]] for name, codes in self.codes.items()}
+        row["scheduled"] = self.scheduled[pos]
+        row["actual"] = self.actual[pos]
+        return row
+
+    def to_rows(self):
+        """Row posisi seperti payload server (hanya kolom DCL_FIELDS), untuk log replay."""
+        values = {pos: self.column(name).tolist() for pos, name in DCL_FIELDS.items()}
+        width = COL_STATUS + 1
+        return [
+            [values[pos][i] if pos in values else "" for pos in range(width)]
+            for i in range(len(self))
+        ]
+
+
+def _as_table(data):
+    """DclTable dari DclTable / DCL frame / list row mentah."""
+    if isinstance(data, DclTable):
+        return data
+    if isinstance(data, pd.DataFrame):
+        return DclTable.from_frame(data)
+    return DclTable.from_rows(data)
+
+
+def _is_rows(data):
+    """List row mentah dari server (bukan DclTable / DCL frame)."""
+    return not isinstance(data, (DclTable, pd.DataFrame))
+
+
+def _row_dict(row):
+    """
+    Satu row mentah -> dict kolom teks seperti DclTable.row (tanpa
+    scheduled / actual datetime, parse satu nilai lewat pandas terlalu mahal).
+    """
+    values = {name: str(row[pos] or "").strip() for pos, name in DCL_FIELDS.items()}
+    values["route_key"] = values["route"].lower()
+    values["status"] = values["raw_status"].lower()
+    return values
+
+
+def get_dcl_table():
+    """DclTable snapshot aktif (kosong jika belum ada data)."""
+    snap = get_dcl_snapshot()
+    return snap.index("table") if snap else DclTable.from_rows([])
+
+
+# COUNTERS (menerima DclTable). List row mentah tetap dihitung dengan loop
+# per row: membangun DclTable untuk sekali hitung jauh lebih mahal (~30 ms
+# untuk 2000 row) daripada loop-nya sendiri (lihat bench/bench_dcl.py).
+def count_status(table, status):
+    status = normalize_status(status)
+    if _is_rows(table):
+        return sum(1 for r in table if normalize_status(r[COL_STATUS]) == status)
+    return int(np.count_nonzero(_as_table(table).status_mask(status)))
+
+
+def count_arrived(table):
+    return count_status(table, "arrived")
 
 
-def count_advanced(rows):
-    return sum(1 for r in rows if normalize_status(r[8]) == "advanced")
+def count_advanced(table):
+    return count_status(table, "advanced")
 
 
-def count_late(rows):
-    return sum(1 for r in rows if normalize_status(r[8]) == "late")
+def count_late(table):
+    return count_status(table, "late")
 
 
-def count_delay(rows):
-    return sum(1 for r in rows if normalize_status(r[8]) == "delay")
+def count_delay(table):
+    return count_status(table, "delay")
 
 
-def count_waiting(rows):
-    return sum(1 for r in rows if normalize_status(r[8]) == "waiting")
+def count_waiting(table):
+    return count_status(table, "waiting")
 
 
-def count_not_arrived(rows):
-    return count_delay(rows) + count_waiting(rows)
+def count_not_arrived(table):
+    if _is_rows(table):
+        return count_delay(table) + count_waiting(table)
+    return int(np.count_nonzero(_as_table(table).status_mask("delay", "waiting")))
 
 
-def count_on_time(rows):
-    return count_arrived(rows)
+def count_on_time(table):
+    return count_arrived(table)
 
 # DOCK COUNTER
-def count_by_dock(rows, dock):
-    return sum(1 for r in rows if str(r[0]).strip() == str(dock).strip())
+def count_by_dock(table, dock):
+    dock = str(dock).strip()
+    if _is_rows(table):
+        return sum(1 for r in table if str(r[COL_DOCK]).strip() == dock)
+    return int(np.count_nonzero(_as_table(table).dock_mask(dock)))
 
 # LIST ROUTES BY STATUS
-def get_routes_by_status(rows, status):
+def get_routes_by_status(table, status):
     status = normalize_status(status)
-    result = []
+    if _is_rows(table):
+        return [str(r[COL_ROUTE]).strip() for r in table if normalize_status(r[COL_STATUS]) == status]
+    table = _as_table(table)
+    return table.column("route", table.status_mask(status)).tolist()
 
-    for r in rows:
-        st = normalize_status(r[8])
-        if st == status:
-            result.append(str(r[2]))
 
+# FIND SINGLE ROUTE ROW (for detail query)
+def find_route_row(table, route_name):
+    """Row pertama route tsb sebagai dict {nama kolom: nilai}, None jika tidak ada."""
+    route_name = route_name.strip().lower()
+    if _is_rows(table):
+        for r in table:
+            if str(r[COL_ROUTE]).strip().lower() == route_name:
+                return _row_dict(r)
+        return None
+    table = _as_table(table)
+    pos = table.route_pos.get(route_name)
+    return None if pos is None else table.row(pos)
+
+
+# HISTORY SNAPSHOT
+# Route bisa muncul lebih dari sekali (beberapa cycle), occurrence ke-2 dst
+# diberi suffix "#n" supaya tiap baris punya entity yang stabil.
+def history_snapshot(table):
+    table = _as_table(table)
+    # kode route -> kode route upper-case ("abc-01" dan "ABC-01" entity yang sama)
+    upper = np.array([str(n).upper() for n in table.names["route"]], dtype=object)
+    routes, inverse = np.unique(upper, return_inverse=True)
+    codes = inverse[table.codes["route"]]
+    occurrence = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    keys = [r if n == 0 else f"{r}#{n + 1}" for r, n in zip(routes[codes].tolist(), occurrence)]
+    return {k: {"status": st} for k, st in zip(keys, table.column("status").tolist())}
+
+
+def count_status_at(status_by_route, status):
+    """Hitung status dari snapshot histori {route: status}."""
+    status = normalize_status(status)
+    if status == "not_arrived":
+        return sum(1 for st in status_by_route.values() if st in ("delay", "waiting"))
+    return sum(1 for st in status_by_route.values() if st == status)
+
+
+# TIMING ANALYTICS (jadwal vs aktual)
+# Jam di-parse sekali per refresh menjadi array datetime64; semua metrik
+# dihitung vectorized di atas array tersebut.
+_TIME_ONLY = r"^\d{1,2}[:.]\d{2}(?::\d{2})?$"
+
+
+def parse_arrival(values, anchor=None):
+    """
+    List nilai jam ("08:30", "2024-05-01 08:30:00", "") -> array datetime64[ns].
+    Nilai jam saja dipasang ke tanggal yang membuatnya paling dekat dengan
+    anchor (selisih maksimal 12 jam), supaya shift malam yang melewati tengah
+    malam tidak bergeser satu hari ("00:20" dilihat jam 23:55 = besok).
+    anchor: datetime / datetime64 atau array sepanjang values (default sekarang).
+    """
+    s = pd.Series(values, dtype="object").astype("string").str.strip()
+    time_only = s.str.match(_TIME_ONLY).fillna(False).to_numpy(dtype=bool)
+
+    parsed = pd.to_datetime(s.where(~time_only), errors="coerce", format="mixed")
+    result = parsed.to_numpy(dtype="datetime64[ns]")
+    if not time_only.any():
+        return result
+
+    hms = s[time_only].str.extract(r"^(\d{1,2})[:.](\d{2})(?::(\d{2}))?$").astype(float).fillna(0)
+    valid = ((hms[0] < 24) & (hms[1] < 60) & (hms[2] < 60)).to_numpy()
+    seconds = (hms[0] * 3600 + hms[1] * 60 + hms[2]).to_numpy()
+    time_of_day = (seconds * 1e9).astype("int64").astype("timedelta64[ns]")
+
+    anchor = datetime.now() if anchor is None else anchor
+    anchor = np.broadcast_to(np.asarray(anchor, dtype="datetime64[ns]"), len(s))[time_only]
+    candidate = anchor.astype("datetime64[D]").astype("datetime64[ns]") + time_of_day
+    half_day, day = np.timedelta64(12, "h"), np.timedelta64(1, "D")
+    candidate = np.where(candidate - anchor > half_day, candidate - day, candidate)
+    candidate = np.where(anchor - candidate > half_day, candidate + day, candidate)
+
+    result[time_only] = np.where(valid, candidate, np.datetime64("NaT"))
     return result
 
 
-# FIND SINGLE ROUTE ROW (for detail query)
+def build_timing(table):
+    """Array timing dari DclTable (None jika tidak ada delivery)."""
+    table = _as_table(table)
+    if not len(table):
+        return None
+    return {
+        "route_names": table.names["route"],
+        "route_codes": table.codes["route"],
+        "scheduled": table.scheduled,
+        "actual": table.actual,
+    }
+
+
+def get_timing():
+    snap = get_dcl_snapshot()
+    return snap.index("timing") if snap else None
+
+
+def _minutes(delta):
+    return delta / np.timedelta64(1, "m")
+
+
+def lateness_stats(timing):
+    """Rata-rata telat / lebih awal (menit) untuk delivery yang sudah datang."""
+    if timing is None:
+        return None
+
+    diff = _minutes(timing["actual"] - timing["scheduled"])
+    valid = ~np.isnan(diff)
+    late = diff[valid & (diff > 0)]
+    early = -diff[valid & (diff < 0)]
+
+    return {
+        "arrived": int(valid.sum()),
+        "late_count": int(late.size),
+        "avg_late": round(float(late.mean()), 1) if late.size else 0.0,
+        "max_late": round(float(late.max()), 1) if late.size else 0.0,
+        "early_count": int(early.size),
+        "avg_early": round(float(early.mean()), 1) if early.size else 0.0,
+    }
+
+
+def most_late_routes(timing, now=None, n=5):
+    """
+    Route dengan keterlambatan terbesar (menit). Yang sudah datang dihitung
+    aktual - jadwal, yang belum datang dihitung sekarang - jadwal.
+    """
+    if timing is None:
+        return []
+
+    now = np.datetime64(now or datetime.now(), "ns")
+    arrived = ~np.isnat(timing["actual"])
+    ref = np.where(arrived, timing["actual"], now)
+    late = _minutes(ref - timing["scheduled"])
+    late = np.where(np.isnan(late), -np.inf, late)
+
+    order = np.argsort(-late)[:n]
+    order = order[late[order] > 0]
+    names, codes = timing["route_names"], timing["route_codes"]
+    return [
+        (names[codes[i]], round(float(late[i]), 1), bool(arrived[i]))
+        for i in order
+    ]
 
-def find_route_row(rows, route_name):
-    route_name = route_name.strip().lower()
 
-    for r in rows:
-        if str(r[2]).strip().lower() == route_name:
-            return r
+def upcoming_deliveries(timing, minutes, now=None):
+    """Route yang belum datang dengan jadwal dalam <minutes> menit ke depan."""
+    if timing is None:
+        return []
 
-    return None
+    now = np.datetime64(now or datetime.now(), "ns")
+    end = now + np.timedelta64(int(minutes), "m")
+    sched = timing["scheduled"]
+    mask = np.isnat(timing["actual"]) & (sched >= now) & (sched <= end)
+    order = np.argsort(sched[mask])
+    return list(timing["route_names"][timing["route_codes"][mask][order]])
 
 
 # SUMMARY (OTIF)
-def summarize_dcl(rows):
-    total = len(rows)
-    advanced = count_advanced(rows)
-    arrived = count_arrived(rows)
-    late = count_late(rows)
-    delay = count_delay(rows)
-    waiting = count_waiting(rows)
+def summarize_dcl(table):
+    if _is_rows(table):
+        counts = Counter(normalize_status(r[COL_STATUS]) for r in table)
+    else:
+        table = _as_table(table)
+        counts = table.status_counts()
+    total = len(table)
+    advanced = int(counts.get("advanced", 0))
+    arrived = int(counts.get("arrived", 0))
+    late = int(counts.get("late", 0))
+    delay = int(counts.get("delay", 0))
+    waiting = int(counts.get("waiting", 0))
     not_arrived = delay + waiting
 
     on_time_ratio = 0
@@ -131,5 +633,6 @@ def summarize_dcl(rows):
         "delay": delay,
         "waiting": waiting,
         "not_arrived": not_arrived,
+        "on_time": arrived,
         "on_time_ratio": on_time_ratio,
     }
@@ -0,0 +1,99 @@
+# src/entity_recognizer.py
+
+import re
+
+ENTITY_TYPES = ("kanban", "route", "dock", "supplier")
+
+_END = "\0"   # key penanda akhir entity di trie
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize(text):
+    return _SPACES.sub(" ", str(text).lower()).strip()
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch in "-_"
+
+
+class Gazetteer:
+    """
+    Trie karakter berisi semua kanban, route, dock dan supplier yang valid
+    pada snapshot saat ini. Teks di-scan satu kali dari kiri ke kanan;
+    di setiap awal kata diambil match terpanjang yang berakhir di batas kata.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.counts = {t: 0 for t in ENTITY_TYPES}
+
+    def add(self, entity_type, value):
+        key = _normalize(value)
+        if not key:
+            return
+        node = self.root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        terminal = node.setdefault(_END, {})
+        if entity_type not in terminal:
+            terminal[entity_type] = str(value).strip()
+            self.counts[entity_type] += 1
+
+    def add_many(self, entity_type, values):
+        for v in values:
+            if v is not None and str(v).strip() not in ("", "nan", "None"):
+                self.add(entity_type, v)
+
+    def has(self, entity_type):
+        return self.counts.get(entity_type, 0) > 0
+
+    def recognize(self, text):
+        """{tipe: [nilai asli, ...]} sesuai urutan kemunculan di text."""
+        found = {t: [] for t in ENTITY_TYPES}
+        text = _normalize(text)
+        n = len(text)
+        i = 0
+
+        while i < n:
+            if i > 0 and _is_word_char(text[i - 1]):
+                i += 1
+                continue
+
+            node = self.root
+            j = i
+            best = None
+            while j < n and text[j] in node:
+                node = node[text[j]]
+                j += 1
+                if _END in node and (j == n or not _is_word_char(text[j])):
+                    best = (j, node[_END])
+
+            if best is None:
+                i += 1
+                continue
+
+            end, terminal = best
+            for entity_type, value in terminal.items():
+                if value not in found[entity_type]:
+                    found[entity_type].append(value)
+            i = end
+
+        return found
+
+
+def build_gazetteer(dcl_table=None, stock_df=None):
+    g = Gazetteer()
+
+    if dcl_table is not None and len(dcl_table):
+        g.add_many("route", dcl_table.names["route"])
+        g.add_many("dock", dcl_table.dock_names)
+
+    if stock_df is not None and not stock_df.empty:
+        if "kanbanno" in stock_df.columns:
+            g.add_many("kanban", stock_df["kanbanno"].dropna().astype(str).unique())
+        if "dockcode" in stock_df.columns:
+            g.add_many("dock", stock_df["dockcode"].dropna().astype(str).unique())
+        if "suppliername" in stock_df.columns:
+            g.add_many("supplier", stock_df["suppliername"].dropna().astype(str).unique())
+
+    return g
@@ -0,0 +1,162 @@
+# src/entity_resolver.py
+
+import re
+from collections import defaultdict
+
+MIN_SCORE = 0.5      # skor minimum kandidat (Dice coefficient bigram)
+ACCEPT_SCORE = 0.75  # di atas ini kandidat teratas langsung dipakai
+MAX_SPAN = 4         # maksimal token yang digabung ("abc 0 1" -> "ABC01")
+MIN_KEY = 3          # panjang minimal span ter-normalisasi yang dicari
+MAX_EDGE_ALPHA = 3   # token huruf saja yang boleh ikut di ujung span
+
+
+def normalize_key(text):
+    return re.sub(r"[^0-9A-Z]", "", str(text).upper())
+
+
+def _bigrams(key):
+    padded = f"^{key}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+class NgramIndex:
+    """
+    Inverted index bigram karakter untuk nama route / kode kanban.
+    Pencarian hanya menyentuh posting list bigram query, bukan seluruh daftar.
+    """
+
+    def __init__(self, names=()):
+        self.names = []      # nama asli (untuk ditampilkan / dicari ulang)
+        self.keys = []       # nama ter-normalisasi
+        self.sizes = []      # jumlah bigram per key
+        self.postings = defaultdict(list)
+        self._by_key = {}
+
+        for name in names:
+            key = normalize_key(name)
+            if not key or key in self._by_key:
+                continue
+            idx = len(self.names)
+            self._by_key[key] = idx
+            self.names.append(str(name).strip())
+            self.keys.append(key)
+            grams = _bigrams(key)
+            self.sizes.append(len(grams))
+            for g in grams:
+                self.postings[g].append(idx)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=5, min_score=MIN_SCORE):
+        """List (nama, skor) terurut dari yang paling mirip."""
+        key = normalize_key(query)
+        if not key:
+            return []
+
+        exact = self._by_key.get(key)
+        if exact is not None:
+            return [(self.names[exact], 1.0)]
+
+        grams = _bigrams(key)
+        common = defaultdict(int)
+        for g in grams:
+            for idx in self.postings.get(g, ()):
+                common[idx] += 1
+
+        scored = []
+        for idx, c in common.items():
+            score = 2.0 * c / (len(grams) + self.sizes[idx])
+            if score >= min_score:
+                scored.append((score, idx))
+
+        # skor sama -> pilih edit distance terkecil
+        scored.sort(key=lambda x: (-x[0], edit_distance(key, self.keys[x[1]])))
+        return [(self.names[idx], round(score, 3)) for score, idx in scored[:limit]]
+
+
+def _has_digit(token):
+    return any(ch.isdigit() for ch in token)
+
+
+def _is_edge(token):
+    # token huruf pendek di ujung kode: "abc 0 1" (prefix route), "937 f"
+    return token.isalpha() and len(token) <= MAX_EDGE_ALPHA
+
+
+def candidate_spans(text):
+    """
+    Gabungan token berurutan yang mirip kode: run token berangka, boleh
+    diapit satu token huruf pendek. Menangani hasil STT seperti "abc 0 1"
+    atau "50 11". Span yang key-nya lebih pendek dari MIN_KEY ("50")
+    tidak dicari: terlalu banyak kode yang mirip.
+    """
+    tokens = [t for t in re.split(r"[\s,;:?!]+", text) if t]
+    spans = []
+    i, n = 0, len(tokens)
+    while i < n:
+        if not _has_digit(tokens[i]):
+            i += 1
+            continue
+        j = i
+        while j < n and _has_digit(tokens[j]):
+            j += 1
+        start = i - 1 if i > 0 and _is_edge(tokens[i - 1]) else i
+        end = j + 1 if j < n and _is_edge(tokens[j]) else j
+        for a in range(start, end):
+            for b in range(a + 1, min(end, a + MAX_SPAN) + 1):
+                span = "".join(tokens[a:b])
+                if _has_digit(span) and len(normalize_key(span)) >= MIN_KEY and span not in spans:
+                    spans.append(span)
+        i = j
+    return spans
+
+
+def resolve(index, text, limit=5):
+    """
+    Cari entity paling mirip dari seluruh span kandidat di text.
+    Mengembalikan list (nama, skor) terurut, tanpa duplikat.
+    """
+    if index is None or not len(index):
+        return []
+
+    best = {}
+    for span in candidate_spans(text):
+        for name, score in index.search(span, limit=limit):
+            if score > best.get(name, 0):
+                best[name] = score
+
+    return sorted(best.items(), key=lambda x: -x[1])[:limit]
+
+
+def pick(candidates):
+    """Nama kandidat teratas jika cukup yakin, selain itu None."""
+    if not candidates:
+        return None
+    name, score = candidates[0]
+    if score >= ACCEPT_SCORE:
+        return name
+    if len(candidates) == 1 or candidates[1][1] < score:
+        return name if score >= MIN_SCORE + 0.1 else None
+    return None
+
+
+def pick_exact(candidates):
+    """
+    Nama kandidat teratas hanya jika sama persis setelah normalisasi
+    ("50 11" -> 5011). Untuk kode kanban: kode yang meleset satu karakter
+    bisa berarti part lain, jadi tidak pernah disubstitusi otomatis.
+    """
+    if candidates and candidates[0][1] >= 1.0:
+        return candidates[0][0]
+    return None
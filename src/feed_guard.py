@@ -0,0 +1,70 @@
+# src/feed_guard.py
+
+import threading
+import time
+from datetime import datetime
+
+BACKOFF_BASE = 5      # detik, jeda pertama setelah gagal
+BACKOFF_MAX = 300     # detik, jeda maksimum
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per endpoint dengan exponential backoff.
+    Selama breaker terbuka, loader tidak menghubungi server dan langsung
+    memakai snapshot terakhir yang berhasil (negative caching).
+    """
+
+    def __init__(self, name, base=BACKOFF_BASE, max_backoff=BACKOFF_MAX):
+        self.name = name
+        self.base = base
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow(self, now=None):
+        now = time.time() if now is None else now
+        return now >= self.open_until
+
+    def is_down(self):
+        return self.failures > 0
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+            self.last_error = None
+
+    def record_failure(self, error=None, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.failures += 1
+            delay = min(self.max_backoff, self.base * 2 ** (self.failures - 1))
+            self.open_until = now + delay
+            self.last_error = error
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url):
+    with _breakers_lock:
+        if url not in _breakers:
+            _breakers[url] = CircuitBreaker(url)
+        return _breakers[url]
+
+
+def staleness_note(label, down, last_ts):
+    """
+    Catatan untuk jawaban yang memakai snapshot lama karena feed sedang down.
+    down: breaker.is_down() window ini, atau kondisi feed publisher (shared snapshot).
+    """
+    if not down:
+        return ""
+    if not last_ts:
+        return f"\n(Catatan: server {label} tidak dapat dihubungi.)"
+    jam = datetime.fromtimestamp(last_ts).strftime("%H:%M")
+    return f"\n(Catatan: server {label} tidak dapat dihubungi, data terakhir jam {jam}.)"
@@ -7,7 +7,9 @@ import traceback
 import customtkinter as ctk
 from PIL import Image
 
-from src.nlp_logic import process_query
+from src.nlp_logic import process_query, load_data, DATA_CACHE_TTL
+from src.dcl_monitoring_json import load_dcl_json
+from src.alert_engine import alerts
 from src.tts_manager import TTSManager
 
 # optional audio libs
@@ -38,6 +40,11 @@ LOGO_ICON = os.path.join(ASSETS_DIR, "logo.png")
 
 tts = TTSManager()
 
+# alert engine: refresh data berkala supaya alert tetap jalan tanpa ada pertanyaan
+ALERT_REFRESH_INTERVAL = DATA_CACHE_TTL
+ALERT_SPEAK = True
+ALERT_SPEAK_MAX = 3   # alert yang dibacakan per refresh; sisanya hanya dihitung
+
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("green")
 
@@ -102,6 +109,12 @@ class PremiumChatGUI(ctk.CTk):
         self.add_bot_message("Selamat datang di Smart Logistic Assistant.")
         threading.Thread(target=lambda: tts.speak("Selamat datang di Smart Logistic Assistant. Apakah ada yang bisa saya bantu?"), daemon=True).start()
 
+        # alerts (stok minus, route delay, rule custom)
+        self.speak_alerts = ALERT_SPEAK
+        self._alert_stop = threading.Event()
+        alerts.subscribe(self._on_alert)
+        threading.Thread(target=self._alert_watch_loop, daemon=True).start()
+
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def _build_sidebar(self):
@@ -228,6 +241,35 @@ class PremiumChatGUI(ctk.CTk):
         except Exception:
             pass
 
+    # Alert watch
+    def _alert_watch_loop(self):
+        while True:
+            try:
+                load_dcl_json()
+                load_data()
+            except Exception:
+                traceback.print_exc()
+            if self._alert_stop.wait(ALERT_REFRESH_INTERVAL):
+                break
+
+    def _on_alert(self, batch):
+        # satu refresh -> satu pesan chat dan satu ucapan TTS, supaya alert
+        # berikutnya tidak memotong suara alert sebelumnya
+        messages = [a["message"] for a in batch]
+        text = "\n".join(messages)
+        try:
+            self.after(0, lambda: self.add_bot_message(text))
+        except Exception:
+            return
+        if self.speak_alerts:
+            spoken = [m.replace("⚠️", "").strip() for m in messages[:ALERT_SPEAK_MAX]]
+            if len(messages) > ALERT_SPEAK_MAX:
+                spoken.append(f"Dan {len(messages) - ALERT_SPEAK_MAX} peringatan lainnya.")
+            try:
+                tts.speak("Peringatan. " + " ".join(spoken))
+            except Exception:
+                pass
+
     # Hold-to-talk behavior
     def _on_mic_click_toggle(self):
         if not SOUND_AVAILABLE or not SR_AVAILABLE:
@@ -343,6 +385,8 @@ class PremiumChatGUI(ctk.CTk):
         self.typing = False
 
     def on_close(self):
+        self._alert_stop.set()
+        alerts.unsubscribe(self._on_alert)
         try:
             tts.stop()
         except Exception:
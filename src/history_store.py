@@ -0,0 +1,283 @@
+# src/history_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+HISTORY_ENABLED = True
+HISTORY_DB = "data/history.db"
+HISTORY_RETENTION = 7 * 24 * 3600   # detik, data lebih tua dari ini di-compact
+COMPACT_INTERVAL = 3600             # detik, jarak antar compaction
+CHECKPOINT_INTERVAL = 1800          # detik, jarak antar checkpoint snapshot penuh
+
+# Satu baris = satu perubahan nilai (delta) untuk (kind, field, entity) pada ts.
+# Primary key sekaligus index waktu+entity, jadi point-in-time lookup cukup
+# satu index seek.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    kind   TEXT NOT NULL,
+    field  TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    value,
+    PRIMARY KEY (kind, field, entity, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_history_ts ON history (kind, ts);
+CREATE INDEX IF NOT EXISTS idx_history_field_ts ON history (kind, field, ts, entity, value);
+CREATE TABLE IF NOT EXISTS history_entity (
+    kind   TEXT NOT NULL,
+    field  TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    PRIMARY KEY (kind, field, entity)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_checkpoint (
+    kind   TEXT NOT NULL,
+    field  TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    data   TEXT NOT NULL,
+    PRIMARY KEY (kind, field, ts)
+) WITHOUT ROWID;
+"""
+# snapshot_at (semua entity pada satu waktu) tidak boleh GROUP BY atas semua
+# delta sampai ts: untuk 2000 kanban x 1 hari itu ~50 ms. Setiap
+# CHECKPOINT_INTERVAL nilai semua entity disimpan utuh (JSON) di
+# history_checkpoint; snapshot_at = checkpoint terakhir <= ts + delta sesudahnya
+# (range scan index kind, field, ts). Tanpa checkpoint (DB lama / ts sebelum
+# checkpoint pertama) dipakai satu index seek per entity dari history_entity.
+
+
+class HistoryStore:
+    """
+    Penyimpanan histori append-only berbasis SQLite.
+    Hanya nilai yang berubah dibanding snapshot sebelumnya yang ditulis.
+    """
+
+    def __init__(self, path=HISTORY_DB, retention=HISTORY_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last = {}          # (kind, field, entity) -> value terakhir
+        self._last_compact = 0.0
+        self._last_checkpoint = {}   # kind -> ts checkpoint terakhir
+
+    # CONNECTION
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+
+        # muat nilai terakhir per entity supaya delta tetap benar setelah restart
+        cur = conn.execute(
+            "SELECT kind, field, entity, value, MAX(ts) FROM history "
+            "GROUP BY kind, field, entity"
+        )
+        self._last = {(k, f, e): v for k, f, e, v, _ in cur}
+        self._last_checkpoint = dict(conn.execute(
+            "SELECT kind, MAX(ts) FROM history_checkpoint GROUP BY kind"
+        ).fetchall())
+        with conn:
+            # DB lama (sebelum ada history_entity) diisi dari histori yang ada
+            conn.executemany("INSERT OR IGNORE INTO history_entity VALUES (?, ?, ?)", self._last)
+        self._conn = conn
+        return conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # WRITE
+    def record(self, kind, snapshot, ts=None):
+        """
+        snapshot: {entity: {field: value}}.
+        Entity yang hilang dari snapshot dicatat sebagai None (tombstone).
+        Mengembalikan jumlah delta yang ditulis.
+        """
+        ts = time.time() if ts is None else ts
+
+        with self._lock:
+            conn = self._connect()
+            deltas = []
+            new_keys = []
+            seen = set()
+
+            for entity, fields in snapshot.items():
+                for field, value in fields.items():
+                    key = (kind, field, entity)
+                    seen.add(key)
+                    if key not in self._last:
+                        new_keys.append(key)
+                    if key not in self._last or self._last[key] != value:
+                        deltas.append((kind, field, entity, ts, value))
+                        self._last[key] = value
+
+            for key, value in list(self._last.items()):
+                if key[0] == kind and key not in seen and value is not None:
+                    deltas.append((key[0], key[1], key[2], ts, None))
+                    self._last[key] = None
+
+            if deltas:
+                with conn:
+                    if new_keys:
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO history_entity VALUES (?, ?, ?)", new_keys
+                        )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?)",
+                        deltas,
+                    )
+
+            if ts - self._last_checkpoint.get(kind, 0.0) >= CHECKPOINT_INTERVAL:
+                self._checkpoint(conn, kind, ts)
+
+            if ts - self._last_compact >= COMPACT_INTERVAL:
+                self._compact(conn, ts)
+                self._last_compact = ts
+
+        return len(deltas)
+
+    def _checkpoint(self, conn, kind, ts):
+        by_field = {}
+        for (k, field, entity), value in self._last.items():
+            if k == kind and value is not None:
+                by_field.setdefault(field, {})[entity] = value
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO history_checkpoint VALUES (?, ?, ?, ?)",
+                [(kind, field, ts, json.dumps(values)) for field, values in by_field.items()],
+            )
+        self._last_checkpoint[kind] = ts
+
+    # COMPACTION (RETENTION)
+    def _compact(self, conn, now):
+        cutoff = now - self.retention
+        with conn:
+            # simpan satu baris dasar (nilai terakhir sebelum cutoff) per entity,
+            # sisanya yang lebih tua dibuang
+            conn.execute(
+                """
+                DELETE FROM history
+                WHERE ts < :cutoff
+                  AND ts < (
+                      SELECT MAX(h.ts) FROM history h
+                      WHERE h.kind = history.kind
+                        AND h.field = history.field
+                        AND h.entity = history.entity
+                        AND h.ts < :cutoff
+                  )
+                """,
+                {"cutoff": cutoff},
+            )
+            # tombstone lama tidak diperlukan sebagai baris dasar
+            conn.execute(
+                "DELETE FROM history WHERE ts < ? AND value IS NULL", (cutoff,)
+            )
+            conn.execute("DELETE FROM history_checkpoint WHERE ts < ?", (cutoff,))
+
+    def compact(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._compact(self._connect(), now)
+            self._last_compact = now
+
+    # READ
+    def value_at(self, kind, entity, field, ts):
+        """Nilai entity pada waktu ts (None jika belum ada / sudah hilang)."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM history "
+                "WHERE kind = ? AND field = ? AND entity = ? AND ts <= ? "
+                "ORDER BY ts DESC LIMIT 1",
+                (kind, field, entity, ts),
+            ).fetchone()
+        return row[0] if row else None
+
+    def series(self, kind, entity, field, start, end):
+        """List (ts, value) pada rentang [start, end], diawali nilai saat start."""
+        with self._lock:
+            conn = self._connect()
+            base = conn.execute(
+                "SELECT ts, value FROM history "
+                "WHERE kind = ? AND field = ? AND entity = ? AND ts <= ? "
+                "ORDER BY ts DESC LIMIT 1",
+                (kind, field, entity, start),
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT ts, value FROM history "
+                "WHERE kind = ? AND field = ? AND entity = ? AND ts > ? AND ts <= ? "
+                "ORDER BY ts",
+                (kind, field, entity, start, end),
+            ).fetchall()
+
+        result = [(start, base[1])] if base else []
+        result.extend(rows)
+        return result
+
+    def first_value(self, kind, entity, field, start, end):
+        """(ts, value) pertama yang tidak None pada rentang [start, end), None jika tidak ada."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT ts, value FROM history "
+                "WHERE kind = ? AND field = ? AND entity = ? AND ts >= ? AND ts < ? "
+                "AND value IS NOT NULL ORDER BY ts LIMIT 1",
+                (kind, field, entity, start, end),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def snapshot_at(self, kind, field, ts):
+        """{entity: value} untuk semua entity yang masih ada pada waktu ts."""
+        with self._lock:
+            conn = self._connect()
+            checkpoint = conn.execute(
+                "SELECT ts, data FROM history_checkpoint "
+                "WHERE kind = ? AND field = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                (kind, field, ts),
+            ).fetchone()
+            if checkpoint:
+                state = json.loads(checkpoint[1])
+                state.update(conn.execute(
+                    "SELECT entity, value FROM history "
+                    "WHERE kind = ? AND field = ? AND ts > ? AND ts <= ? ORDER BY ts",
+                    (kind, field, checkpoint[0], ts),
+                ))
+                return {e: v for e, v in state.items() if v is not None}
+
+            cur = conn.execute(
+                """
+                SELECT e.entity, (
+                    SELECT h.value FROM history h
+                    WHERE h.kind = e.kind AND h.field = e.field
+                      AND h.entity = e.entity AND h.ts <= :ts
+                    ORDER BY h.ts DESC LIMIT 1
+                )
+                FROM history_entity e
+                WHERE e.kind = :kind AND e.field = :field
+                """,
+                {"kind": kind, "field": field, "ts": ts},
+            )
+            return {e: v for e, v in cur if v is not None}
+
+
+history = HistoryStore()
+
+
+def record_snapshot(kind, snapshot, ts=None):
+    """Dipanggil loader setiap refresh; gagal tulis tidak boleh mengganggu query."""
+    if not HISTORY_ENABLED:
+        return 0
+    try:
+        return history.record(kind, snapshot, ts)
+    except Exception:
+        return 0
@@ -0,0 +1,232 @@
+# src/intent_classifier.py
+
+import os
+import pickle
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+INTENT_DATASET = "data/intents.csv"      # kolom: text;intent
+INTENT_MODEL = "data/intent_model.pkl"
+CLASSIFIER_ENABLED = True
+CLASSIFIER_BACKEND = "sklearn"           # "sklearn" atau "centroid" (numpy saja)
+# ambang confidence per backend; dipilih lewat sweep "detect_intent" di
+# python -m bench.bench_intent (classifier hanya dipakai jika rule tidak kena)
+MIN_CONFIDENCE = {"sklearn": 0.3, "centroid": 0.8}
+OTHER_INTENT = "other"                   # label untuk pertanyaan yang harus lewat rule
+
+
+# BACKENDS
+class SklearnBackend:
+    """TF-IDF char n-gram + Logistic Regression (butuh scikit-learn)."""
+
+    name = "sklearn"
+
+    def __init__(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+
+        self.model = make_pipeline(
+            TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True),
+            LogisticRegression(C=10, max_iter=2000),
+        )
+
+        self._compiled = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_compiled"] = None   # analyzer tidak bisa di-pickle, dibangun ulang
+        return state
+
+    def fit(self, texts, labels):
+        self.model.fit(texts, labels)
+        self._compiled = None
+        return self
+
+    def _compile(self):
+        # predict_proba sklearn ~1 ms/panggilan karena validasi input; untuk
+        # query tunggal skor dihitung langsung dari vocabulary, idf dan coef.
+        vec, lr = self.model.steps[0][1], self.model.steps[1][1]
+        self._compiled = {
+            "analyzer": vec.build_analyzer(),
+            "vocab": vec.vocabulary_,
+            "idf": vec.idf_,
+            "coef": lr.coef_.T.copy(),
+            "intercept": lr.intercept_,
+            "classes": [str(c) for c in lr.classes_],
+        }
+        return self._compiled
+
+    def _predict_one(self, text, c):
+        counts = {}
+        for gram in c["analyzer"](text):
+            j = c["vocab"].get(gram)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+
+        z = c["intercept"].copy()
+        if counts:
+            idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            v = (1 + np.log(tf)) * c["idf"][idx]
+            v /= np.linalg.norm(v)
+            z += v @ c["coef"][idx]
+
+        p = np.exp(z - z.max())
+        p /= p.sum()
+        best = int(p.argmax())
+        return c["classes"][best], float(p[best])
+
+    def predict(self, texts):
+        lr = self.model.steps[1][1]
+        if lr.coef_.shape[0] == 1:
+            # model biner: pakai jalur sklearn biasa
+            proba = self.model.predict_proba(texts)
+            best = proba.argmax(axis=1)
+            classes = self.model.classes_
+            return [(str(classes[i]), float(proba[row, i])) for row, i in enumerate(best)]
+
+        c = self._compiled or self._compile()
+        return [self._predict_one(t, c) for t in texts]
+
+
+class CentroidBackend:
+    """
+    Hashed char n-gram TF-IDF + nearest centroid (cosine), hanya numpy.
+    Dipakai jika scikit-learn tidak terpasang.
+    """
+
+    name = "centroid"
+
+    def __init__(self, dim=4096, ngram_range=(2, 4), temperature=0.05):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.temperature = temperature
+        self.idf = None
+        self.centroids = None
+        self.classes_ = None
+
+    def _counts(self, texts):
+        X = np.zeros((len(texts), self.dim), dtype=np.float32)
+        lo, hi = self.ngram_range
+        for row, text in enumerate(texts):
+            padded = f" {text.lower().strip()} "
+            for n in range(lo, hi + 1):
+                for i in range(len(padded) - n + 1):
+                    X[row, zlib.crc32(padded[i:i + n].encode()) % self.dim] += 1
+        return X
+
+    def _transform(self, texts):
+        X = np.log1p(self._counts(texts)) * self.idf
+        norm = np.linalg.norm(X, axis=1, keepdims=True)
+        return X / np.where(norm == 0, 1, norm)
+
+    def fit(self, texts, labels):
+        counts = self._counts(texts)
+        df = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+        X = self._transform(texts)
+        labels = np.asarray(labels)
+        self.classes_ = np.unique(labels)
+        C = np.stack([X[labels == c].mean(axis=0) for c in self.classes_])
+        self.centroids = C / np.linalg.norm(C, axis=1, keepdims=True)
+        return self
+
+    def predict(self, texts):
+        sim = self._transform(texts) @ self.centroids.T
+        z = (sim - sim.max(axis=1, keepdims=True)) / self.temperature
+        proba = np.exp(z)
+        proba /= proba.sum(axis=1, keepdims=True)
+        best = proba.argmax(axis=1)
+        return [(str(self.classes_[i]), float(proba[row, i])) for row, i in enumerate(best)]
+
+
+BACKENDS = {
+    "sklearn": SklearnBackend,
+    "centroid": CentroidBackend,
+}
+
+
+def make_backend(name=CLASSIFIER_BACKEND):
+    # tanpa scikit-learn ImportError diteruskan: classifier mati, rule saja.
+    # Backend centroid lebih lemah dari rule, hanya dipakai jika dipilih eksplisit.
+    return BACKENDS[name]()
+
+
+# DATASET / TRAINING
+def load_dataset(path=INTENT_DATASET):
+    df = pd.read_csv(path, sep=";")
+    df = df.dropna(subset=["text", "intent"])
+    return df["text"].str.lower().str.strip().tolist(), df["intent"].str.strip().tolist()
+
+
+def train(path=INTENT_DATASET, model_path=INTENT_MODEL, backend=CLASSIFIER_BACKEND):
+    texts, labels = load_dataset(path)
+    clf = make_backend(backend).fit(texts, labels)
+    if model_path:
+        folder = os.path.dirname(model_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(model_path, "wb") as f:
+            pickle.dump(clf, f)
+    return clf
+
+
+# LAZY LOAD
+_classifier = {"model": None, "loaded": False}
+_classifier_lock = threading.Lock()
+
+
+def _model_is_fresh():
+    if not os.path.exists(INTENT_MODEL):
+        return False
+    if not os.path.exists(INTENT_DATASET):
+        return True
+    return os.path.getmtime(INTENT_MODEL) >= os.path.getmtime(INTENT_DATASET)
+
+
+def get_classifier():
+    """Model dimuat dari disk saat pertama dipakai; dilatih ulang jika dataset lebih baru."""
+    if _classifier["loaded"]:
+        return _classifier["model"]
+
+    with _classifier_lock:
+        if not _classifier["loaded"]:
+            model = None
+            try:
+                if _model_is_fresh():
+                    with open(INTENT_MODEL, "rb") as f:
+                        model = pickle.load(f)
+                if getattr(model, "name", None) != CLASSIFIER_BACKEND and os.path.exists(INTENT_DATASET):
+                    # belum ada model, dataset lebih baru, atau model dari backend lain;
+                    # path dibaca saat dipanggil (default argumen train() terikat saat import)
+                    model = train(INTENT_DATASET, INTENT_MODEL, CLASSIFIER_BACKEND)
+            except Exception as e:
+                print(f"[❌] Gagal memuat intent classifier: {e}")
+                model = None
+            _classifier["model"] = model
+            _classifier["loaded"] = True
+    return _classifier["model"]
+
+
+def predict_batch(texts):
+    """List (intent, confidence) untuk banyak teks sekaligus."""
+    model = get_classifier() if CLASSIFIER_ENABLED else None
+    if model is None or not texts:
+        return [(None, 0.0)] * len(texts)
+    return model.predict([t.lower().strip() for t in texts])
+
+
+def predict_intent(text):
+    """
+    Intent hasil classifier jika cukup yakin, selain itu None.
+    OTHER_INTENT berarti classifier yakin ini bukan intent sederhana.
+    """
+    intent, confidence = predict_batch([text])[0]
+    if intent is None or confidence < MIN_CONFIDENCE.get(getattr(_classifier["model"], "name", None), 1.0):
+        return None
+    return intent
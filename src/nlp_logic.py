@@ -1,11 +1,24 @@
 # src/nlp_logic.py
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
 import re
+import threading
 import time
+import numpy as np
 import pandas as pd
 import requests
 
+from src.history_store import history, record_snapshot
+from src.alert_engine import alerts, evaluate_snapshot, flush_alerts
+from src.entity_resolver import NgramIndex, candidate_spans, resolve, pick, pick_exact
+from src.feed_guard import get_breaker, staleness_note
+from src.intent_classifier import predict_intent, OTHER_INTENT
+from src.entity_recognizer import build_gazetteer
+from src.query_log import log_query
+from src import shared_snapshot
+from src.snapshot import Snapshot, pin, pinned
+
 # DCL JSON loader
 from src.dcl_monitoring_json import (
     load_dcl_json,
@@ -20,6 +33,17 @@ from src.dcl_monitoring_json import (
     count_on_time,
     get_routes_by_status,
     find_route_row,
+    count_status_at,
+    get_route_index,
+    get_dcl_version,
+    dcl_payload,
+    get_dcl_snapshot,
+    get_dcl_table,
+    dcl_staleness_note,
+    get_timing,
+    lateness_stats,
+    most_late_routes,
+    upcoming_deliveries,
 )
 
 
@@ -28,7 +52,35 @@ API_URL = "http://10.64.6.27/legion/all_data_dock43.php"  # STOCK only
 CSV_FALLBACK = "data/master_parts.csv"
 DATA_CACHE_TTL = 30
 
-_data_cache = {"df": None, "ts": 0}
+# snapshot stock aktif (src/snapshot.py), diganti utuh setiap refresh
+_stock_snapshot: Optional[Snapshot] = None
+# shared_meta: meta shared snapshot yang dipakai window pembaca (None = fetch sendiri)
+_data_state = {"attempt_ts": 0, "shared_meta": None}   # bookkeeping loader, hanya diubah di bawah _data_lock
+_data_lock = threading.Lock()
+
+# group-by aggregate yang dihitung sekali per refresh: nama view -> kolom
+AGGREGATE_KEYS = {
+    "supplier": "suppliername",
+    "plant": "plantcode",
+    "dock": "dockcode",
+    "alamat": "kanbanaddress",
+}
+AGGREGATE_TOP_N = 10
+
+# gazetteer entity (kanban/route/dock/supplier) untuk snapshot saat ini
+# (versions, gazetteer) diganti sebagai satu tuple agar tidak pernah tercampur
+_gazetteer_cache: Tuple[Any, Any] = (None, None)
+
+# memo jawaban: (intent, entities, versi snapshot) -> reply
+ANSWER_CACHE_SIZE = 256
+_answer_cache: Dict[Tuple, str] = {}
+_answer_cache_versions: Tuple[int, int] = (-1, -1)
+
+# kolom stock yang dicatat ke history store setiap refresh
+HISTORY_STOCK_FIELDS = ("stockoverall", "stocksps", "stockreceiving", "stockspsminutes")
+
+# kata waktu -> jam (untuk "sejak pagi", "siang tadi", dll)
+TIME_WORDS = {"pagi": 6, "siang": 12, "sore": 15, "malam": 19}
 
 conversation_context: Dict[str, Optional[str]] = {
     "last_kanban": None,
@@ -43,7 +95,7 @@ def _now_ts() -> float:
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    df = df.copy(deep=False)   # kolom hanya diganti nama, data tidak perlu disalin
     df.columns = [c.strip().lower() for c in df.columns]
     return df
 
@@ -59,6 +111,76 @@ def safe_get(mapping: Dict[str, Any], *possible_keys: str) -> Optional[Any]:
     return None
 
 
+# TIME REFERENCE — "jam 9", "jam 10.30", "sejak pagi"
+def parse_time_reference(text: str, now: Optional[datetime] = None) -> Optional[float]:
+    now = now or datetime.now()
+
+    m = re.search(r"\bjam\s*(\d{1,2})(?:[.:](\d{2}))?\b", text)
+    if m:
+        hour, minute = int(m.group(1)), int(m.group(2) or 0)
+        if hour > 23 or minute > 59:
+            return None
+    else:
+        hour = next((h for w, h in TIME_WORDS.items() if w in text), None)
+        if hour is None:
+            return None
+        minute = 0
+
+    t = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if t > now:
+        t -= timedelta(days=1)
+    return t.timestamp()
+
+
+# STATUS DETECTOR (keyword sama dengan DCL intents di process_query)
+def detect_status(text: str) -> Optional[str]:
+    if any(x in text for x in ["arrived", "sudah tiba", "sudah datang", "sampai"]):
+        return "arrived"
+    if any(x in text for x in ["advanced", "lebih cepat", "lebih awal", "advance"]):
+        return "advanced"
+    if any(x in text for x in ["late", "terlambat"]):
+        return "late"
+    if "delay" in text:
+        return "delay"
+    if "waiting" in text:
+        return "waiting"
+    if any(x in text for x in ["belum datang", "belum tiba", "not arrived"]):
+        return "not_arrived"
+    return None
+
+
+# ENTITY RECOGNIZER — gazetteer dari snapshot DCL + stock, dibangun ulang
+# hanya jika salah satu snapshot berganti versi
+def get_gazetteer():
+    global _gazetteer_cache
+    versions = (get_dcl_version(), get_stock_version())
+    cached_versions, gazetteer = _gazetteer_cache
+    if cached_versions != versions:
+        stock = get_stock_snapshot()
+        gazetteer = build_gazetteer(get_dcl_table(), stock.data if stock else None)
+        _gazetteer_cache = (versions, gazetteer)
+    return gazetteer
+
+
+def recognize_entities(text: str) -> Dict[str, Any]:
+    """
+    Satu kali scan: kanban/route/dock/supplier yang benar-benar ada di snapshot.
+    Jika snapshot belum punya daftar kanban/route/dock, pakai detector regex lama.
+    """
+    g = get_gazetteer()
+    found = g.recognize(text)
+    if not g.has("route"):
+        route = extract_route(text)
+        found["route"] = [route] if route else []
+    if not g.has("kanban"):
+        code = extract_kanban(text)
+        found["kanban"] = [code] if code else []
+    if not g.has("dock"):
+        dock = extract_dock(text)
+        found["dock"] = [dock] if dock else []
+    return found
+
+
 # FIXED — ROUTE DETECTOR (SAFE VERSION)
 def extract_route(text: str) -> Optional[str]:
     if not text:
@@ -111,6 +233,24 @@ def extract_kanban(text: str) -> Optional[str]:
     return None
 
 
+# frasa waktu / jumlah yang bukan kode: "jam 9", "10.30", "120 menit", "50 pcs"
+NON_CODE_PHRASES = re.compile(
+    r"\b(jam|pukul)\s*\d{1,2}([:.]\d{2})?\b|\b\d{1,2}[:.]\d{2}\b"
+    r"|\b\d+\s*(menit|jam|detik|hari|pcs|pc|box)\b"
+)
+
+
+def code_text(text: str) -> str:
+    """Teks tanpa frasa waktu / jumlah, untuk mencari span mirip kode."""
+    return NON_CODE_PHRASES.sub(" ", text)
+
+
+# DOCK DETECTOR — "dock 43", "dock43"
+def extract_dock(text: str) -> Optional[str]:
+    m = re.search(r"dock\s*(\d+)", text)
+    return m.group(1) if m else None
+
+
 # FIND PART
 def find_part(df: pd.DataFrame, code: str) -> Optional[Dict[str, Any]]:
     if df is None or df.empty:
@@ -152,168 +292,729 @@ def get_top_critical_stock_overall(df, n=5):
     return df2.to_dict(orient="records")
 
 
-# LOAD STOCK DATA
-def load_data(force_refresh: bool = False) -> pd.DataFrame:
-    global _data_cache
+# STOCK SNAPSHOT UNTUK HISTORY STORE
+def stock_history_snapshot(df: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+    if df is None or df.empty or "kanbanno" not in df.columns:
+        return {}
+
+    cols = [c for c in HISTORY_STOCK_FIELDS if c in df.columns]
+    keys = df["kanbanno"].astype(str).str.strip().str.upper()
+    values = df[cols].apply(pd.to_numeric, errors="coerce")
+    values = values.astype(object).where(values.notna(), None)
+
+    snapshot: Dict[str, Dict[str, Optional[float]]] = {}
+    for key, row in zip(keys, values.itertuples(index=False)):
+        if key not in snapshot:
+            snapshot[key] = dict(zip(cols, row))
+    return snapshot
+
+
+# STOCK FRAME UNTUK ALERT ENGINE (index = kanban, kolom = yang diawasi rule)
+def stock_alert_frame(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty or "kanbanno" not in df.columns:
+        return pd.DataFrame()
+
+    cols = [c for c in alerts.columns("stock") if c in df.columns]
+    # category (shared snapshot) -> object: category antar snapshot tidak bisa dibandingkan
+    frame = df[cols].astype({c: object for c in cols if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    frame.index = df["kanbanno"].astype(str).str.strip().str.upper()
+    return frame[~frame.index.duplicated()]
+
+
+# AGGREGATE VIEWS (per supplier / plant / dock / alamat)
+def _group_keys(values: pd.Series):
+    """
+    Key group-by per row (strip, kosong -> "?"). Kolom category (shared
+    snapshot) dikelompokkan lewat kodenya tanpa men-decode setiap row.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.fillna("?").astype(str).str.strip()
+    names = [str(c).strip() for c in values.cat.categories] + ["?"]
+    keys, inverse = np.unique(np.array(names, dtype=object), return_inverse=True)
+    # kode -1 (kosong) -> entry terakhir inverse = "?"
+    return pd.Categorical.from_codes(inverse[values.array.codes], categories=keys)
+
+
+def build_stock_views(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Hitung agregat group-by secara vectorized. Hasil sudah diurutkan,
+    jadi intent agregat cukup membaca list tanpa scan ulang DataFrame.
+    """
+    if df is None or df.empty or "stockoverall" not in df.columns:
+        return {}
+
+    stock = pd.to_numeric(df["stockoverall"], errors="coerce")
+    base = pd.DataFrame({"stock": stock, "minus": stock < 0})
+
+    views: Dict[str, Dict[str, Any]] = {}
+    for name, col in AGGREGATE_KEYS.items():
+        if col not in df.columns:
+            continue
+
+        g = base.groupby(_group_keys(df[col]), sort=False, observed=True)
+        table = pd.DataFrame({
+            "parts": g.size(),
+            "total_stock": g["stock"].sum(),
+            "minus_parts": g["minus"].sum().astype(int),
+        })
+
+        by_minus = table[table["minus_parts"] > 0].sort_values(
+            ["minus_parts", "total_stock"], ascending=[False, True]
+        )
+        by_stock = table.sort_values("total_stock", ascending=False)
+
+        views[name] = {
+            "table": table,
+            "by_minus": list(by_minus.head(AGGREGATE_TOP_N).itertuples(name=None)),
+            "by_stock": list(by_stock.head(AGGREGATE_TOP_N).itertuples(name=None)),
+            "groups": len(table),
+        }
+    return views
+
+
+def build_kanban_index(df: pd.DataFrame) -> Optional[NgramIndex]:
+    if df is None or df.empty or "kanbanno" not in df.columns:
+        return None
+    return NgramIndex(df["kanbanno"].dropna().astype(str))
+
+
+def get_stock_views() -> Dict[str, Dict[str, Any]]:
+    load_data()
+    snap = get_stock_snapshot()
+    return snap.index("views") if snap else {}
+
+
+# "per dock", "tiap supplier", "supplier mana yang ..." -> agregat;
+# "alamatnya dimana?", "supplier part ini" -> pertanyaan lanjutan untuk last_kanban
+AGGREGATE_CUES = re.compile(r"\b(per|tiap|setiap|semua|terbanyak)\b|paling banyak|\bmana yang\b")
+FOLLOW_UP_CUES = re.compile(r"(supplier|plant|dock|alamat|address)\s*-?\s*nya\b|\b(ini|itu|tersebut)\b")
+
+
+def detect_aggregate(text: str, follow_up: bool = False) -> Optional[str]:
+    """
+    Kembalikan nama view jika pertanyaan bersifat agregat (per supplier, dll).
+    follow_up=True jika ada kanban di context: tanpa cue agregat yang tegas
+    pertanyaan dianggap lanjutan untuk kanban tersebut.
+    """
+    if not AGGREGATE_CUES.search(text):
+        if not re.search(r"\bmana\b", text):
+            return None
+        if follow_up or FOLLOW_UP_CUES.search(text):
+            return None
+    if "supplier" in text:
+        return "supplier"
+    if "plant" in text:
+        return "plant"
+    if "dock" in text:
+        return "dock"
+    if "alamat" in text or "address" in text:
+        return "alamat"
+    return None
+
+
+# PUBLISH STOCK SNAPSHOT (df + turunan)
+def publish_stock_df(df: pd.DataFrame, ts: Optional[float] = None,
+                     snapshot_id: Optional[str] = None) -> pd.DataFrame:
+    """Bangun snapshot stock baru beserta view/index turunannya lalu pasang sebagai snapshot aktif."""
+    global _stock_snapshot
+    df = normalize_columns(df)
+    ts = _now_ts() if ts is None else ts
+    previous = _stock_snapshot
+    _stock_snapshot = Snapshot(
+        kind="stock",
+        data=df,
+        ts=ts,
+        version=previous.version + 1 if previous else 1,
+        snapshot_id=snapshot_id or f"stock-{int(ts * 1000)}",
+        indexes={
+            "views": build_stock_views(df),
+            "kanban_index": build_kanban_index(df),
+        },
+    )
+    return df
 
-    if (
-        not force_refresh
-        and _data_cache["df"] is not None
-        and (_now_ts() - _data_cache["ts"]) < DATA_CACHE_TTL
-    ):
-        return _data_cache["df"]
 
+def get_stock_snapshot() -> Optional[Snapshot]:
+    """Snapshot yang di-pin thread ini (lihat process_query), atau snapshot terbaru."""
+    return pinned("stock") or _stock_snapshot
+
+
+def get_stock_version() -> int:
+    snap = get_stock_snapshot()
+    return snap.version if snap else 0
+
+
+def get_stock_snapshot_id() -> Optional[str]:
+    snap = get_stock_snapshot()
+    return snap.snapshot_id if snap else None
+
+
+# SHARED SNAPSHOT (beberapa window di satu PC, lihat src/shared_snapshot.py)
+# Di window pembaca kolom teks menjadi category dengan kode dari mmap.
+def share_stock_df(snap: Snapshot) -> None:
+    df = snap.data
+    shared_snapshot.publish(
+        "stock",
+        {col: df[col].to_numpy() for col in df.columns},
+        # ts = fetch terakhir yang berhasil; feed_down diperbarui publisher saat fetch gagal
+        {"snapshot_id": snap.snapshot_id, "ts": snap.ts, "feed_down": False},
+    )
+
+
+def _load_shared_stock() -> bool:
+    """Pasang snapshot dari publisher jika ada yang baru. True jika cache berisi snapshot shared."""
+    current = _stock_snapshot
+    shared = shared_snapshot.read("stock", current.snapshot_id if current else None)
+    if shared is None:
+        if current is None or not shared_snapshot.publisher_alive():
+            return False
+        # snapshot sama, tapi kondisi feed publisher bisa berubah
+        meta = shared_snapshot.read_meta("stock")
+    else:
+        meta, columns = shared
+        # copy=False: kolom numerik dan kode category tetap menunjuk ke memory-mapped file
+        df = publish_stock_df(pd.DataFrame(columns, copy=False), meta["ts"], meta["snapshot_id"])
+        evaluate_snapshot("stock", stock_alert_frame(df))
+    _data_state["shared_meta"] = meta
+    return True
+
+
+# LOAD STOCK DATA (with caching + single-flight + circuit breaker)
+# Caller yang menemukan cache basi menunggu satu fetch bersama; jika ada fetch
+# yang selesai setelah caller ini meminta, hasilnya langsung dipakai.
+# Selama API down (breaker terbuka) snapshot terakhir dipakai apa adanya;
+# CSV fallback hanya dibaca jika belum ada snapshot sama sekali.
+def load_data(force_refresh: bool = False) -> pd.DataFrame:
+    snap = pinned("stock")
+    if snap is not None:
+        # di tengah satu jawaban: jangan refresh, pakai snapshot yang di-pin
+        return snap.data
+
+    requested = _now_ts()
+    snap = _stock_snapshot
+    if not force_refresh and snap is not None and (requested - snap.ts) < DATA_CACHE_TTL:
+        return snap.data
+
+    publisher = not shared_snapshot.SHARED_SNAPSHOT_ENABLED or shared_snapshot.acquire_publisher(requested)
+    if not publisher:
+        # window lain yang fetch; cukup baca snapshot miliknya
+        try:
+            with _data_lock:
+                if _load_shared_stock():
+                    return _stock_snapshot.data
+        finally:
+            flush_alerts()
+        # publisher belum menulis snapshot: fetch sendiri, tapi tidak di-share
+        # supaya pointer milik publisher tidak tertimpa
+
+    breaker = get_breaker(API_URL)
+    if not breaker.allow() and _stock_snapshot is not None:
+        return _stock_snapshot.data
+
+    # alert dikirim setelah _data_lock dilepas
     try:
-        resp = requests.get(API_URL, timeout=5)
-        payload = resp.json()
-        if isinstance(payload, dict) and "data" in payload:
-            df = pd.DataFrame(payload["data"])
-            df = normalize_columns(df)
-            _data_cache["df"] = df
-            _data_cache["ts"] = _now_ts()
+        with _data_lock:
+            if _data_state["attempt_ts"] >= requested:
+                return _stock_snapshot.data if _stock_snapshot is not None else pd.DataFrame()
+
+            try:
+                return _fetch_stock(breaker, share=shared_snapshot.SHARED_SNAPSHOT_ENABLED and publisher)
+            finally:
+                _data_state["attempt_ts"] = _now_ts()
+    finally:
+        flush_alerts()
+
+
+def _fetch_stock(breaker, share: bool = False) -> pd.DataFrame:
+    _data_state["shared_meta"] = None   # fetch sendiri: breaker window ini yang berlaku
+    if breaker.allow():
+        try:
+            resp = requests.get(API_URL, timeout=5)
+            payload = resp.json()
+            if not isinstance(payload, dict) or "data" not in payload:
+                raise ValueError("payload stock tidak valid")
+            df = publish_stock_df(pd.DataFrame(payload["data"]))
+            snap = _stock_snapshot
+            breaker.record_success()
+            if share:
+                share_stock_df(snap)
+            record_snapshot("stock", stock_history_snapshot(df), snap.ts)
+            evaluate_snapshot("stock", stock_alert_frame(df))
             return df
-    except Exception:
-        pass
+        except Exception as e:
+            breaker.record_failure(e)
+            if share:
+                # window pembaca tetap memakai snapshot terakhir, tapi dengan catatan staleness
+                shared_snapshot.update_meta("stock", feed_down=True)
+
+    if _stock_snapshot is not None:
+        return _stock_snapshot.data
 
     try:
-        df = pd.read_csv(CSV_FALLBACK, sep=";")
-        df = normalize_columns(df)
-        _data_cache["df"] = df
-        _data_cache["ts"] = _now_ts()
-        return df
+        return publish_stock_df(pd.read_csv(CSV_FALLBACK, sep=";"))
     except Exception:
         return pd.DataFrame()
 
 
-# MAIN NLP PROCESSOR
-def process_query(user_input: str) -> str:
-    if not user_input or not user_input.strip():
-        return "Silakan masukkan pertanyaan."
+def stock_staleness_note() -> str:
+    snap = get_stock_snapshot()
+    meta = _data_state["shared_meta"]
+    # window pembaca: breaker sendiri tidak pernah fetch, pakai kondisi feed publisher
+    down = bool(meta.get("feed_down")) if meta is not None else get_breaker(API_URL).is_down()
+    return staleness_note("stock", down, snap.ts if snap else 0)
 
-    txt = user_input.lower().strip()
 
-    # Load DCL
-    dcl = load_dcl_json()
-    dcl_rows = dcl.get("rows", []) if dcl else []
+# INTENT PARSER
+# Semua keputusan rule-based ada di sini; hasilnya (intent, entities) menjadi
+# kunci memo jawaban sehingga variasi kalimat dengan maksud sama berbagi cache.
+STATUS_INTENTS = ("arrived", "advanced", "late", "delay", "waiting", "not_arrived", "ontime")
 
-    # Detect route
-    route = extract_route(txt)
+TIMING_INTENTS = {"avg_lateness", "most_late", "upcoming"}
 
-    
-    # 1) FOLLOW-UP: “rute apa saja?” (mengacu ke last_status_query)
-    
-    if route is None and ("route" in txt or txt in "rute"):
-        last_status = conversation_context.get("last_status_query")
-        if last_status:
-            routes = get_routes_by_status(dcl_rows, last_status)
+DCL_INTENTS = {
+    "route_list", "route_detail", "history_status", "performance", "dock_count",
+    *STATUS_INTENTS, *TIMING_INTENTS,
+}
+STOCK_INTENTS = {"history_stock", "aggregate", "critical_stock", "kanban_not_found"}
+STATIC_INTENTS = {"empty", "kanban_missing", "unknown"}
+
+# intent yang bisa diprediksi intent classifier (lihat data/intents.csv)
+CLASSIFIED_INTENTS = {
+    "route_list", "performance", "avg_lateness", "most_late", "critical_stock",
+    *STATUS_INTENTS,
+}
+
+CRITICAL_KEYWORDS = [
+    "top 5", "top five", "top5",
+    "critical", "kritis", "stok minus",
+    "paling critical", "paling kritis",
+    "stock critical", "critical stock",
+]
+
+
+def _stock_intent(txt: str) -> str:
+    if "stock" in txt or "stok" in txt or "total stok" in txt:
+        if "menit" in txt:
+            return "stock_minutes"
+        if "jam" in txt:
+            return "stock_hours"
+        if "sps" in txt or "line" in txt:
+            return "stock_sps"
+        if "receiving" in txt:
+            return "stock_receiving"
+        if "over flow" in txt or "overflow" in txt or "over" in txt:
+            return "stock_overflow"
+        return "stock_total"
+
+    if "supplier code" in txt or "supp. code" in txt or "supp code" in txt:
+        return "supplier_code"
+    if "supplier" in txt:
+        return "supplier"
+
+    if "plant" in txt:
+        return "plant"
+    if "dock" in txt:
+        return "dock"
+
+    if "alamat" in txt or "address" in txt:
+        return "address"
+
+    if "part no" in txt or "part number" in txt or "part no." in txt or "no. part" in txt or "no part" in txt:
+        return "part_no"
+    if "nama part" in txt or "part name" in txt:
+        return "part_name"
+
+    if "pcs per kanban" in txt or "isi kanban" in txt or "pcs perkanban" in txt or "qty perkanban" in txt or "qty per kanban" in txt:
+        return "pcs_per_kanban"
+
+    if "last received" in txt or "terakhir" in txt:
+        return "last_received"
+
+    return "kanban_info"
+
+
+def _upcoming_intent(txt: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Intent "berapa delivery dalam 30 menit ke depan?" (di-memo per menit)."""
+    m = re.search(r"(\d+)\s*(menit|jam)\s*(ke\s*depan|kedepan|lagi)", txt)
+    if not m:
+        return None
+    minutes = int(m.group(1)) * (60 if m.group(2) == "jam" else 1)
+    return "upcoming", {"minutes": minutes, "minute": int(_now_ts() // 60)}
+
+
+def rule_intent(txt: str) -> Optional[str]:
+    """Keyword rule untuk intent tanpa entity (dicek sebelum classifier)."""
+    if any(x in txt for x in ["paling telat", "paling terlambat", "paling lama telat", "telat terlama"]):
+        return "most_late"
+
+    if any(x in txt for x in ["rata-rata", "rata rata", "rerata", "average"]) and any(
+        x in txt for x in ["telat", "terlambat", "late", "awal", "advance"]
+    ):
+        return "avg_lateness"
+
+    # FOLLOW-UP: “rute apa saja?” (mengacu ke last_status_query)
+    if "route" in txt or txt in "rute":
+        return "route_list"
+
+    status = detect_status(txt)
+    if status is None and ("on time" in txt or "ontime" in txt):
+        status = "ontime"
+    if status:
+        return status
+
+    # Performance / summary
+    if any(x in txt for x in ["performance", "summary", "ringkas", "ringkasan", "kondisi"]):
+        return "performance"
+
+    return None
+
+
+def detect_intent(txt: str) -> Optional[str]:
+    """
+    Intent tanpa entity: keyword rule dulu (lebih akurat, lihat
+    bench/bench_intent.py), classifier hanya untuk kalimat yang tidak kena
+    rule dan hanya jika yakin. None = lanjut ke rule berbasis entity.
+    """
+    intent = rule_intent(txt)
+    if intent is not None:
+        return intent
+    predicted = predict_intent(txt)
+    return None if predicted == OTHER_INTENT else predicted
+
+
+def _kanban_exists(df: pd.DataFrame, code: str) -> bool:
+    g = get_gazetteer()
+    if g.has("kanban"):
+        return bool(g.recognize(code)["kanban"])
+    return find_part(df, code) is not None
+
+
+def parse_query(txt: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Tentukan intent dan entity dari teks (sudah lower-case).
+    conversation_context ikut di-update di sini supaya tetap konsisten
+    walaupun jawabannya nanti diambil dari memo.
+    """
+    if not txt:
+        return "empty", {}
+
+    load_dcl_json()
+    df = load_data()
+
+    # Detect entities (satu pass, hanya entity yang valid di snapshot)
+    found = recognize_entities(txt)
+    route = found["route"][0] if found["route"] else None
+    kanban = found["kanban"][0] if found["kanban"] else None
+
+    # kode (kanban / route) yang disebut, tanpa "jam 9" / "120 menit"
+    codes_txt = code_text(txt)
+    mentioned = bool(candidate_spans(codes_txt))
+
+    # Fuzzy fallback untuk hasil voice yang meleset ("abc 01", "abd-01")
+    route_candidates = []
+    if route is None and ("route" in txt or "rute" in txt):
+        route_candidates = resolve(get_route_index(), codes_txt)
+        route = pick(route_candidates)
+
+    # Route tertulis lengkap ("xyz-99") tapi tidak ada di snapshot: jawab
+    # "tidak ditemukan" + saran, jangan jatuh ke route_list / status
+    if route is None:
+        typed = extract_route(txt)
+        if typed:
+            if not route_candidates:
+                route_candidates = resolve(get_route_index(), typed)
+            route = typed
+
+    # ROUTE DETAIL
+    if route:
+        return "route_detail", {
+            "route": route,
+            "candidates": tuple(name for name, _ in route_candidates),
+        }
+
+    # UPCOMING: "berapa delivery dalam 30 menit ke depan?"
+    upcoming = _upcoming_intent(txt)
+    if upcoming:
+        return upcoming
+
+    # HISTORY: "berapa delay jam 9 tadi?", "stok 5011 turun berapa sejak pagi?"
+    at_ts = parse_time_reference(txt)
+    if at_ts is not None:
+        status = detect_status(txt)
+        # "stoknya turun berapa sejak jam 9?" -> kanban dari pertanyaan sebelumnya
+        code = kanban or (None if mentioned else conversation_context.get("last_kanban"))
+        if status:
+            return "history_status", {"status": status, "at": at_ts}
+        if code and any(x in txt for x in ["turun", "naik", "berubah", "selisih", "sejak"]):
+            return "history_stock", {"code": code, "at": at_ts}
+
+    # INTENT TANPA ENTITY (status, route list, performance, timing, critical)
+    intent = detect_intent(txt)
+    if intent in STATUS_INTENTS:
+        conversation_context["last_status_query"] = intent
+        return intent, {}
+    if intent == "route_list":
+        return intent, {"status": conversation_context.get("last_status_query")}
+    if intent == "most_late":
+        return intent, {"minute": int(_now_ts() // 60)}
+    if intent in CLASSIFIED_INTENTS:
+        return intent, {}
+
+    # Dock-based: "berapa delivery dock 43?" (dock di luar snapshot tetap dijawab, 0 delivery)
+    dock = found["dock"][0] if found["dock"] else None
+    if dock and "dock" in txt:
+        return "dock_count", {"dock": dock}
+    dock = extract_dock(txt)
+    if dock:
+        return "dock_count", {"dock": dock}
+
+    # AGGREGATE STOCK: "supplier mana yang paling banyak part minus?", "total stok per dock",
+    # "berapa part minus dari SUP B?", "stok per dock untuk SUP B"
+    supplier = found["supplier"][0] if found["supplier"] else None
+    group = detect_aggregate(txt, follow_up=bool(conversation_context.get("last_kanban")))
+    if (group or supplier) and not kanban:
+        minus = any(x in txt for x in ["minus", "kritis", "critical", "shortage", "kurang"])
+        return "aggregate", {
+            "group": group or "supplier",
+            "metric": "minus" if minus else "stock",
+            "supplier": supplier,
+        }
+
+    # TOP 5 CRITICAL STOCK (BERDASARKAN STOCKOVERALL MINUS)
+    if any(x in txt for x in CRITICAL_KEYWORDS):
+        return "critical_stock", {}
+
+    # 4) STOCK (KANBAN)
+    last_kanban = conversation_context.get("last_kanban")
+    code = kanban
+    stock_words = any(k in txt for k in ["kanban", "part", "stok", "stock", "supplier"])
+
+    # Kode dari voice sering terpisah ("50 11") -> hanya match persis setelah
+    # normalisasi yang dipakai. Kode yang mirip ("5012" vs 5011) hanya jadi saran:
+    # beda satu karakter bisa berarti part lain.
+    kanban_candidates = []
+    if stock_words and code is None:
+        stock = get_stock_snapshot()
+        kanban_candidates = resolve(stock.index("kanban_index") if stock else None, codes_txt)
+        code = pick_exact(kanban_candidates)
+        # kode disebut tapi tidak ada di snapshot: jangan jatuh ke last_kanban
+        if code is None and (kanban_candidates or mentioned):
+            return "kanban_not_found", {
+                "code": "",
+                "candidates": tuple(name for name, _ in kanban_candidates),
+            }
+
+    code = code or last_kanban
+
+    if not code:
+        return ("kanban_missing" if stock_words else "unknown"), {}
+
+    if not _kanban_exists(df, code):
+        return "kanban_not_found", {
+            "code": code,
+            "candidates": tuple(name for name, _ in kanban_candidates),
+        }
+
+    conversation_context["last_kanban"] = code
+
+    return _stock_intent(txt), {"code": code}
+
+
+# ANSWER BUILDER
+def natural_count_response(label: str, count_value: int) -> str:
+    """
+    Membuat respon natural.
+    Jika 0 -> "Tidak ada <label> saat ini."
+    Jika >0 -> "Ada <count> <label>."
+    """
+    if count_value == 0:
+        return f"Tidak ada {label} saat ini."
+    return f"Ada {count_value} {label}."
+
+
+STATUS_RESPONSES = {
+    "arrived": (count_arrived, "delivery yang sudah tiba"),
+    "advanced": (count_advanced, "delivery yang lebih cepat (advanced)"),
+    "late": (count_late, "delivery yang Late (sudah datang lewat jadwal)"),
+    "delay": (count_delay, "delivery yang Delay (belum datang tapi lewat jadwal)"),
+    "waiting": (count_waiting, "delivery yang Waiting (belum saatnya datang)"),
+    "not_arrived": (count_not_arrived, "delivery yang belum tiba"),
+    "ontime": (count_on_time, "delivery yang On-Time"),
+}
+
+
+def answer_query(intent: str, entities: Dict[str, Any]) -> str:
+    if intent == "empty":
+        return "Silakan masukkan pertanyaan."
+    if intent == "kanban_missing":
+        return "Silakan sebutkan kode Kanban atau nomor part."
+    if intent == "unknown":
+        return "Permintaan tidak dikenali. Anda bisa menanyakan delivery atau stock parts."
+
+    if intent in DCL_INTENTS:
+        load_dcl_json()
+        table = get_dcl_table()
+
+        if intent == "route_list":
+            last_status = entities["status"]
+            if not last_status:
+                return "Status apa yang ingin ditampilkan? (advanced, late, arrived, delay, waiting)"
+            routes = get_routes_by_status(table, last_status)
             if not routes:
                 return f"Tidak ada route yang berstatus {last_status}."
             return "Berikut route yang " + last_status + ":\n- " + "\n- ".join(routes)
-        else:
-            return "Status apa yang ingin ditampilkan? (advanced, late, arrived, delay, waiting)"
 
-    
-    # 2) ROUTE DETAIL
-   
-    if route:
-        row = find_route_row(dcl_rows, route)
-        if row:
+        if intent == "route_detail":
+            route = entities["route"]
+            row = find_route_row(table, route)
+            if row:
+                return (
+                    f"Informasi Route {route}:\n"
+                    f"- Status: {row['raw_status'] or '-'}\n"
+                    f"- Scheduled Arrival: {row['scheduled_arrival'] or '-'}\n"
+                    f"- Actual Arrival: {row['actual_arrival'] or '-'}"
+                )
+            if entities["candidates"]:
+                return (
+                    f"Saya tidak menemukan informasi route {route}. Mungkin maksud Anda: "
+                    + ", ".join(entities["candidates"]) + "?"
+                )
+            return f"Saya tidak menemukan informasi route {route}."
+
+        if intent == "history_status":
+            at_label = datetime.fromtimestamp(entities["at"]).strftime("%H:%M")
+            snapshot = history.snapshot_at("dcl", "status", entities["at"])
+            if not snapshot:
+                return f"Belum ada histori delivery pada jam {at_label}."
+            c = count_status_at(snapshot, entities["status"])
+            return f"Pada jam {at_label} ada {c} delivery berstatus {entities['status']}."
+
+        if intent == "avg_lateness":
+            st = lateness_stats(get_timing())
+            if not st or st["arrived"] == 0:
+                return "Belum ada delivery yang sudah datang untuk dihitung."
             return (
-                f"Informasi Route {route}:\n"
-                f"- Status: {row.get('raw_status')}\n"
-                f"- Scheduled Arrival: {row.get('scheduled_arrival')}\n"
-                f"- Actual Arrival: {row.get('actual_arrival')}"
+                f"Rata-rata telat {st['avg_late']:g} menit "
+                f"({st['late_count']} dari {st['arrived']} delivery yang sudah datang, "
+                f"maksimum {st['max_late']:g} menit).\n"
+                f"Rata-rata lebih awal {st['avg_early']:g} menit ({st['early_count']} delivery)."
             )
-        return f"Saya tidak menemukan informasi route {route}."
 
-    
-    # 3) DCL INTENTS (lebih natural + handle 0 result)   
-    def natural_count_response(label: str, count_value: int) -> str:
-        """
-        Membuat respon natural.
-        Jika 0 -> "Tidak ada <label> saat ini."
-        Jika >0 -> "Ada <count> <label>."
-        """
-        if count_value == 0:
-            return f"Tidak ada {label} saat ini."
-        return f"Ada {count_value} {label}."
-
-    # ----- Arrived -----
-    if any(x in txt for x in ["arrived", "sudah tiba", "sudah datang", "sampai"]):
-        conversation_context["last_status_query"] = "arrived"
-        c = count_arrived(dcl_rows)
-        return natural_count_response("delivery yang sudah tiba", c)
-
-    # ----- Advanced -----
-    if any(x in txt for x in ["advanced", "lebih cepat", "lebih awal", "advance"]):
-        conversation_context["last_status_query"] = "advanced"
-        c = count_advanced(dcl_rows)
-        return natural_count_response("delivery yang lebih cepat (advanced)", c)
-
-    # ----- Late -----
-    if any(x in txt for x in ["late", "terlambat"]):
-        conversation_context["last_status_query"] = "late"
-        c = count_late(dcl_rows)
-        return natural_count_response("delivery yang Late (sudah datang lewat jadwal)", c)
-
-    # ----- Delay -----
-    if "delay" in txt:
-        conversation_context["last_status_query"] = "delay"
-        c = count_delay(dcl_rows)
-        return natural_count_response("delivery yang Delay (belum datang tapi lewat jadwal)", c)
-
-    # ----- Waiting -----
-    if "waiting" in txt:
-        conversation_context["last_status_query"] = "waiting"
-        c = count_waiting(dcl_rows)
-        return natural_count_response("delivery yang Waiting (belum saatnya datang)", c)
-
-    # ----- Belum datang / Not Arrived -----
-    if any(x in txt for x in ["belum datang", "belum tiba", "not arrived"]):
-        conversation_context["last_status_query"] = "not_arrived"
-        c = count_not_arrived(dcl_rows)
-        return natural_count_response("delivery yang belum tiba", c)
-
-    # ----- On-time -----
-    if "on time" in txt or "ontime" in txt:
-        conversation_context["last_status_query"] = "ontime"
-        c = count_on_time(dcl_rows)
-        return natural_count_response("delivery yang On-Time", c)
+        if intent == "most_late":
+            routes = most_late_routes(get_timing(), n=5)
+            if not routes:
+                return "Tidak ada route yang telat saat ini."
+            msg = "Route paling telat:\n"
+            for i, (name, minutes, arrived) in enumerate(routes, start=1):
+                ket = "sudah datang" if arrived else "belum datang"
+                msg += f"{i}. {name} | {minutes:g} menit ({ket})\n"
+            return msg
+
+        if intent == "upcoming":
+            minutes = entities["minutes"]
+            routes = upcoming_deliveries(get_timing(), minutes)
+            if not routes:
+                return f"Tidak ada delivery yang dijadwalkan dalam {minutes} menit ke depan."
+            return (
+                f"Ada {len(routes)} delivery dijadwalkan dalam {minutes} menit ke depan:\n- "
+                + "\n- ".join(routes)
+            )
 
+        if intent in STATUS_RESPONSES:
+            counter, label = STATUS_RESPONSES[intent]
+            return natural_count_response(label, counter(table))
 
-    # Performance / summary
-    if any(x in txt for x in ["performance", "summary", "ringkas", "ringkasan", "kondisi"]):
-        s = summarize_dcl(dcl_rows)
+        if intent == "performance":
+            s = summarize_dcl(table)
+            return (
+                "Ringkasan Delivery Performance hari ini:\n"
+                f"- Total Delivery: {s['total']}\n"
+                f"- Advanced: {s['advanced']}\n"
+                f"- Arrived: {s['arrived']}\n"
+                f"- Late: {s['late']}\n"
+                f"- Delay: {s['delay']}\n"
+                f"- Waiting: {s['waiting']}\n"
+                f"- Belum Tiba: {s['not_arrived']}\n"
+                f"- On-Time: {s['on_time']}\n"
+                f"- On-Time Ratio: {s['on_time_ratio']}%"
+            )
+
+        if intent == "dock_count":
+            dock = entities["dock"]
+            return f"Dock {dock} memiliki {count_by_dock(table, dock)} delivery hari ini."
+
+    df = load_data()
+
+    if intent == "history_stock":
+        code = entities["code"]
+        at_label = datetime.fromtimestamp(entities["at"]).strftime("%H:%M")
+        part = find_part(df, code)
+        if not part:
+            return f"Saya tidak menemukan Kanban {code}."
+        key = str(part.get("kanbanno", code)).strip().upper()
+        before = history.value_at("stock", key, "stockoverall", entities["at"])
+        if before is None:
+            # aplikasi baru jalan setelah jam yang diminta ("sejak pagi" = 06:00):
+            # pakai nilai pertama yang tercatat pada hari itu
+            day_end = datetime.fromtimestamp(entities["at"]).replace(
+                hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            first = history.first_value(
+                "stock", key, "stockoverall", entities["at"], day_end.timestamp())
+            if first:
+                at_label = datetime.fromtimestamp(first[0]).strftime("%H:%M")
+                before = first[1]
+        now_val = pd.to_numeric(part.get("stockoverall"), errors="coerce")
+        if before is None or pd.isna(now_val):
+            return f"Belum ada histori stok Kanban {code} sejak jam {at_label}."
+        diff = float(now_val) - float(before)
+        if diff == 0:
+            return f"Stok Kanban {code} tidak berubah sejak jam {at_label} ({before:g} pcs)."
+        arah = "naik" if diff > 0 else "turun"
         return (
-            "Ringkasan Delivery Performance hari ini:\n"
-            f"- Total Delivery: {s['total']}\n"
-            f"- Advanced: {s['advanced']}\n"
-            f"- Arrived: {s['arrived']}\n"
-            f"- Late: {s['late']}\n"
-            f"- Delay: {s['delay']}\n"
-            f"- Waiting: {s['waiting']}\n"
-            f"- Belum Tiba: {s['not_arrived']}\n"
-            f"- On-Time: {s['on_time']}\n"
-            f"- On-Time Ratio: {s['on_time_ratio']}%"
+            f"Stok Kanban {code} {arah} {abs(diff):g} pcs sejak jam {at_label} "
+            f"({before:g} → {float(now_val):g} pcs)."
         )
 
-    # Dock-based
-    if "dock" in txt:
-        m = re.search(r"dock\s*(\d+)", txt)
-        if m:
-            dock = m.group(1)
-            return f"Dock {dock} memiliki {count_by_dock(dcl_rows, dock)} delivery hari ini."
-        
-        
-  
-    # TOP 5 CRITICAL STOCK (BERDASARKAN STOCKOVERALL MINUS)  
-    if any(x in txt for x in [
-        "top 5", "top five", "top5",
-        "critical", "kritis", "stok minus",
-        "paling critical", "paling kritis",
-        "stock critical", "critical stock"
-    ]):
-        df = load_data()
+    if intent == "aggregate":
+        group = entities["group"]
+        supplier = entities.get("supplier")
+        views = get_stock_views()
+
+        if supplier and group == "supplier":
+            table = views["supplier"]["table"] if "supplier" in views else None
+            if table is None or supplier not in table.index:
+                return f"Data stock supplier {supplier} belum tersedia."
+            parts, total, minus = table.loc[supplier, ["parts", "total_stock", "minus_parts"]]
+            return (
+                f"Supplier {supplier}: {int(parts)} part, total stok {total:g} pcs, "
+                f"{int(minus)} part minus."
+            )
+
+        if supplier:
+            # view per supplier hanya untuk part supplier tsb (dihitung saat ditanya)
+            part_df = df[df["suppliername"].astype(str).str.strip() == supplier]
+            view = build_stock_views(part_df).get(group)
+            scope = f" untuk supplier {supplier}"
+        else:
+            view = views.get(group)
+            scope = ""
+        if not view:
+            return f"Data stock per {group}{scope} belum tersedia."
+
+        if entities["metric"] == "minus":
+            if not view["by_minus"]:
+                return f"Tidak ada {group} dengan part minus{scope} saat ini."
+            msg = f"{group.capitalize()} dengan part minus terbanyak{scope}:\n"
+            for i, (key, parts, total, minus) in enumerate(view["by_minus"], start=1):
+                msg += f"{i}. {key} | {minus} dari {parts} part minus | total {total:g} pcs\n"
+            return msg
+
+        msg = f"Total stok per {group}{scope} ({view['groups']} {group}):\n"
+        for i, (key, parts, total, minus) in enumerate(view["by_stock"], start=1):
+            msg += f"{i}. {key} | {total:g} pcs | {parts} part\n"
+        return msg
+
+    if intent == "critical_stock":
         critical = get_top_critical_stock_overall(df, n=5)
 
         if not critical:
@@ -328,25 +1029,21 @@ def process_query(user_input: str) -> str:
             )
         return msg
 
+    code = entities.get("code")
 
-
-    # 4) STOCK (KANBAN)
-        df = load_data()
-    last_kanban = conversation_context.get("last_kanban")
-    code = extract_kanban(txt) or last_kanban
-
-    if not code:
-        if any(k in txt for k in ["kanban", "part", "stok", "stock", "supplier"]):
-            return "Silakan sebutkan kode Kanban atau nomor part."
-        return "Permintaan tidak dikenali. Anda bisa menanyakan delivery atau stock parts."
+    if intent == "kanban_not_found":
+        label = code or "tersebut"
+        if entities["candidates"]:
+            return (
+                f"Saya tidak menemukan Kanban {label}. Mungkin maksud Anda: "
+                + ", ".join(entities["candidates"]) + "?"
+            )
+        return f"Saya tidak menemukan Kanban {label}."
 
     part = find_part(df, code)
     if not part:
-        conversation_context["last_kanban"] = code
         return f"Saya tidak menemukan Kanban {code}."
 
-    conversation_context["last_kanban"] = code
-
     # extract values
     part_name = safe_get(part, "partname")
     part_no = safe_get(part, "partno")
@@ -364,42 +1061,116 @@ def process_query(user_input: str) -> str:
     stock_overflow = safe_get(part, "stockoverflow")
 
     # STOCK INTENTS
-    if "stock" in txt or "stok" in txt or "total stok" in txt:
-        if "menit" in txt:
-            return f"Total Stok Kanban {code} = {stock_minutes} menit."
-        if "jam" in txt:
-            if stock_minutes:
-                return f"Total Stok Kanban {code} = {round(float(stock_minutes)/60, 2)} jam."
-        if "sps" in txt or "line" in txt:
-            return f"Stock SPS (line side) Kanban {code} = {stock_sps} pcs."
-        if "receiving" in txt:
-            return f"Stock Receiving Kanban {code} = {stock_receiving} pcs."
-        if "over flow" in txt or "overflow" in txt or "over" in txt:
-            return f"Stock overflow kanban {code} = {stock_overflow}."
+    if intent == "stock_minutes":
+        return f"Total Stok Kanban {code} = {stock_minutes} menit."
+    if intent == "stock_hours":
+        if stock_minutes:
+            return f"Total Stok Kanban {code} = {round(float(stock_minutes)/60, 2)} jam."
+        return f"Stok menit Kanban {code} tidak tersedia."
+    if intent == "stock_sps":
+        return f"Stock SPS (line side) Kanban {code} = {stock_sps} pcs."
+    if intent == "stock_receiving":
+        return f"Stock Receiving Kanban {code} = {stock_receiving} pcs."
+    if intent == "stock_overflow":
+        return f"Stock overflow kanban {code} = {stock_overflow}."
+    if intent == "stock_total":
         return f"Stok Kanban {code} = {stock_pcs} pcs."
 
-    if "supplier code" in txt or "supp. code" in txt or "supp code" in txt:
+    if intent == "supplier_code":
         return f"Supplier code Kanban {code} = {supplier_code}."
-    if "supplier" in txt:
+    if intent == "supplier":
         return f"Supplier Kanban {code} = {supplier}."
 
-    if "plant" in txt:
+    if intent == "plant":
         return f"Plant {plant_code}, Dock {dock_code}."
-    if "dock" in txt:
+    if intent == "dock":
         return f"Dock Kanban {code} = {dock_code}."
 
-    if "alamat" in txt or "address" in txt:
+    if intent == "address":
         return f"Alamat Kanban {code} = {address}."
 
-    if "part no" in txt or "part number" in txt or "part no." in txt or "no. part" in txt or "no part" in txt:
+    if intent == "part_no":
         return f"Part number Kanban {code} = {part_no}."
-    if "nama part" in txt or "part name" in txt:
+    if intent == "part_name":
         return f"Nama part Kanban {code} = {part_name}."
 
-    if "pcs per kanban" in txt or "isi kanban" in txt or "pcs perkanban" in txt or "qty perkanban" in txt or "qty per kanban" in txt:
+    if intent == "pcs_per_kanban":
         return f"Isi per Kanban {code} = {pcs_per_kanban} pcs."
 
-    if "last received" in txt or "terakhir" in txt:
+    if intent == "last_received":
         return f"Terakhir diterima: {last_received}"
 
     return f"Kanban {code} ditemukan. Silakan tanya stok, supplier, part no, atau informasi lainnya."
+
+
+# ANSWER MEMO
+def _snapshot_version(intent: str) -> Tuple[int, int]:
+    """Versi snapshot yang dipakai intent (0 = tidak bergantung data)."""
+    if intent in STATIC_INTENTS:
+        return (0, 0)
+    if intent in DCL_INTENTS:
+        return (get_dcl_version(), 0)
+    return (0, get_stock_version())
+
+
+def clear_answer_cache() -> None:
+    _answer_cache.clear()
+
+
+# MAIN NLP PROCESSOR
+def process_query(user_input: str) -> str:
+    return process_query_with_intent(user_input)[0]
+
+
+def process_query_with_intent(user_input: str) -> Tuple[str, str]:
+    start = time.perf_counter()
+
+    # refresh (jika TTL habis) sebelum pin; selama jawaban disusun kedua
+    # snapshot tidak berganti walau thread lain memasang data baru
+    load_dcl_json()
+    load_data()
+    dcl, stock = get_dcl_snapshot(), get_stock_snapshot()
+    with pin(dcl, stock):
+        reply, intent = _answer_pinned(user_input)
+
+    # payload diambil dari snapshot yang di-pin, hanya untuk snapshot yang dipakai query
+    payloads = {}
+    if dcl is not None:
+        payloads[dcl.snapshot_id] = lambda: dcl_payload(dcl)
+    if stock is not None:
+        payloads[stock.snapshot_id] = lambda: stock.data.to_dict(orient="records")
+    log_query(
+        user_input, intent,
+        (dcl.snapshot_id if dcl else None, stock.snapshot_id if stock else None),
+        (time.perf_counter() - start) * 1e3,
+        payloads,
+    )
+    return reply, intent
+
+
+def _answer_pinned(user_input: str) -> Tuple[str, str]:
+    global _answer_cache_versions
+
+    txt = (user_input or "").lower().strip()
+    intent, entities = parse_query(txt)
+
+    # snapshot baru masuk -> semua jawaban lama tidak berlaku lagi
+    versions = (get_dcl_version(), get_stock_version())
+    if versions != _answer_cache_versions:
+        _answer_cache.clear()
+        _answer_cache_versions = versions
+
+    key = (intent, tuple(sorted(entities.items())), _snapshot_version(intent))
+    reply = _answer_cache.get(key)
+    if reply is None:
+        reply = answer_query(intent, entities)
+        if len(_answer_cache) >= ANSWER_CACHE_SIZE:
+            _answer_cache.clear()
+        _answer_cache[key] = reply
+
+    # catatan staleness tidak ikut di-memo, selalu sesuai kondisi feed saat ini
+    if intent in DCL_INTENTS:
+        reply += dcl_staleness_note()
+    elif intent not in STATIC_INTENTS:
+        reply += stock_staleness_note()
+    return reply, intent
@@ -0,0 +1,109 @@
+# src/query_log.py
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# aktifkan dengan QUERY_LOG_ENABLED = True atau env SMARTLOG_QUERY_LOG=1
+QUERY_LOG_ENABLED = os.environ.get("SMARTLOG_QUERY_LOG") == "1"
+QUERY_LOG_DIR = "logs"
+SNAPSHOT_DIR = os.path.join(QUERY_LOG_DIR, "snapshots")
+SNAPSHOT_RETENTION_DAYS = 7     # payload lebih tua dari ini dihapus
+PRUNE_INTERVAL = 3600           # detik antar pembersihan SNAPSHOT_DIR
+
+_lock = threading.Lock()
+_state = {"pruned_ts": 0.0}
+
+
+def query_log_path(day=None):
+    day = day or datetime.now().strftime("%Y%m%d")
+    return os.path.join(QUERY_LOG_DIR, f"queries-{day}.jsonl")
+
+
+def snapshot_path(snapshot_id):
+    return os.path.join(SNAPSHOT_DIR, f"{snapshot_id}.json")
+
+
+def snapshot_ts(snapshot_id):
+    """Waktu fetch dari snapshot id ("dcl-<ms>" / "stock-<ms>"), None jika tidak terbaca."""
+    try:
+        return int(snapshot_id.rsplit("-", 1)[1]) / 1000
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def log_query(text, intent, snapshot_ids, latency_ms, payloads=None):
+    """
+    Satu baris JSON per pertanyaan. Gagal tulis tidak boleh mengganggu query.
+    payloads: {snapshot_id: fungsi tanpa argumen -> data}, dipanggil hanya
+    jika payload snapshot tersebut belum tersimpan.
+    """
+    if not QUERY_LOG_ENABLED:
+        return
+    for snapshot_id, build in (payloads or {}).items():
+        record_payload(snapshot_id, build)
+    entry = {
+        "ts": time.time(),
+        "text": text,
+        "intent": intent,
+        "dcl_snapshot": snapshot_ids[0],
+        "stock_snapshot": snapshot_ids[1],
+        "latency_ms": round(latency_ms, 3),
+    }
+    try:
+        with _lock:
+            os.makedirs(QUERY_LOG_DIR, exist_ok=True)
+            with open(query_log_path(), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception:
+        pass
+
+
+def record_payload(snapshot_id, build):
+    """Simpan payload DCL / stock yang dipakai query, sekali per snapshot."""
+    if not QUERY_LOG_ENABLED or not snapshot_id:
+        return
+    path = snapshot_path(snapshot_id)
+    try:
+        with _lock:
+            if os.path.exists(path):
+                return
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(build(), f, ensure_ascii=False, default=str)
+            _prune_payloads()
+    except Exception:
+        pass
+
+
+def _prune_payloads(now=None):
+    # dipanggil di bawah _lock setelah payload baru ditulis, paling sering sekali per PRUNE_INTERVAL
+    now = time.time() if now is None else now
+    if now - _state["pruned_ts"] < PRUNE_INTERVAL:
+        return
+    _state["pruned_ts"] = now
+    cutoff = now - SNAPSHOT_RETENTION_DAYS * 86400
+    for name in os.listdir(SNAPSHOT_DIR):
+        path = os.path.join(SNAPSHOT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def load_payload(snapshot_id):
+    with open(snapshot_path(snapshot_id), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_log(path):
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
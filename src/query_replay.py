@@ -0,0 +1,123 @@
+# src/query_replay.py
+# Replay query log terhadap snapshot yang direkam, tanpa akses ke server.
+#   python -m src.query_replay logs/queries-20251119.jsonl --concurrency 4
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+import pandas as pd
+
+from src import dcl_monitoring_json, history_store, nlp_logic, query_log, shared_snapshot
+from src.query_log import load_payload, read_log, snapshot_ts
+
+
+def _offline_mode():
+    # snapshot dipasang manual, loader tidak boleh fetch / menulis histori.
+    # TTL tak hingga hanya berlaku selama snapshot terpasang; _install selalu
+    # memasang snapshot (kosong jika tidak ada di log).
+    dcl_monitoring_json.DCL_CACHE_TTL = float("inf")
+    nlp_logic.DATA_CACHE_TTL = float("inf")
+    history_store.HISTORY_ENABLED = False
+    # histori tidak ikut direkam: pakai DB kosong di memori, jangan baca data/history.db live
+    history_store.history.close()
+    history_store.history.path = ":memory:"
+    query_log.QUERY_LOG_ENABLED = False
+    shared_snapshot.SHARED_SNAPSHOT_ENABLED = False
+
+
+def _install(dcl_id, stock_id, loaded):
+    # id None: saat query dicatat belum ada snapshot -> pasang snapshot kosong.
+    # ts diambil dari snapshot id supaya jam kedatangan (hanya jam) ditempel
+    # ke tanggal saat data di-fetch, bukan tanggal replay.
+    if "dcl" not in loaded or loaded["dcl"] != dcl_id:
+        dcl_monitoring_json.publish_dcl_rows(
+            load_payload(dcl_id) if dcl_id else [], snapshot_ts(dcl_id), dcl_id)
+        loaded["dcl"] = dcl_id
+    if "stock" not in loaded or loaded["stock"] != stock_id:
+        nlp_logic.publish_stock_df(
+            pd.DataFrame(load_payload(stock_id) if stock_id else []), snapshot_ts(stock_id), stock_id)
+        loaded["stock"] = stock_id
+
+
+def _run_one(entry, cold):
+    if cold:
+        nlp_logic.clear_answer_cache()
+    start = time.perf_counter()
+    _, intent = nlp_logic.process_query_with_intent(entry["text"])
+    return (time.perf_counter() - start) * 1e3, intent
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+def replay(entries, concurrency=1, cold=False):
+    _offline_mode()
+    latencies, mismatches, skipped = [], 0, 0
+    loaded = {}
+
+    wall_start = time.perf_counter()
+    key = lambda e: (e.get("dcl_snapshot"), e.get("stock_snapshot"))
+    for (dcl_id, stock_id), group in groupby(entries, key=key):
+        group = list(group)
+        try:
+            _install(dcl_id, stock_id, loaded)
+        except FileNotFoundError:
+            skipped += len(group)
+            continue
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda e: _run_one(e, cold), group))
+
+        for entry, (latency, intent) in zip(group, results):
+            latencies.append(latency)
+            if intent != entry.get("intent"):
+                mismatches += 1
+    wall = time.perf_counter() - wall_start
+
+    original = [e["latency_ms"] for e in entries if "latency_ms" in e]
+    return {
+        "queries": len(latencies),
+        "skipped": skipped,
+        "wall_s": wall,
+        "throughput": len(latencies) / wall if wall > 0 else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else 0.0,
+        "orig_p50_ms": percentile(original, 50),
+        "orig_p95_ms": percentile(original, 95),
+        "intent_mismatch": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay query log Smart Logistic Assistant")
+    ap.add_argument("log", nargs="?", default=query_log.query_log_path())
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=1, help="ulang seluruh log N kali")
+    ap.add_argument("--cold", action="store_true", help="kosongkan memo jawaban tiap query")
+    args = ap.parse_args()
+
+    entries = read_log(args.log) * args.repeat
+    r = replay(entries, concurrency=args.concurrency, cold=args.cold)
+
+    print(f"log          : {args.log}")
+    print(f"queries      : {r['queries']} (skip {r['skipped']} tanpa snapshot)")
+    print(f"concurrency  : {args.concurrency}")
+    print(f"throughput   : {r['throughput']:.1f} query/s ({r['wall_s']:.2f} s)")
+    print(f"latency      : mean {r['mean_ms']:.3f} | p50 {r['p50_ms']:.3f} | "
+          f"p95 {r['p95_ms']:.3f} | p99 {r['p99_ms']:.3f} | max {r['max_ms']:.3f} ms")
+    print(f"tercatat     : p50 {r['orig_p50_ms']:.3f} | p95 {r['orig_p95_ms']:.3f} ms")
+    print(f"intent beda  : {r['intent_mismatch']}")
+
+
+if __name__ == "__main__":
+    main()
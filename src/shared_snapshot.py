@@ -0,0 +1,283 @@
+# src/shared_snapshot.py
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import msvcrt
+except ImportError:   # bukan Windows
+    msvcrt = None
+    import fcntl
+
+# Beberapa window assistant di satu PC berbagi satu snapshot:
+# satu proses (publisher) fetch lalu menulis data kolom ke file memory-mapped,
+# proses lain cukup membaca file itu. Kolom numerik / datetime dipakai langsung
+# dari mmap; kolom teks disimpan sebagai kode category (int8/16/32) + dictionary,
+# pembaca memakai kode dari mmap apa adanya (pd.Categorical.from_codes tanpa
+# salinan), hanya dictionary nilai unik yang dibuat per proses.
+SHARED_SNAPSHOT_ENABLED = os.environ.get("SMARTLOG_SHARED_SNAPSHOT") == "1"
+SHARED_DIR = "data/shared"
+LEASE_TIMEOUT = 90        # detik, publisher dianggap mati jika lease tidak diperbarui
+KEEP_VERSIONS = 3         # file snapshot lama yang dipertahankan per kind
+
+_MAGIC = b"SLSNAP1\0"
+_ALIGN = 64
+
+_lock = threading.Lock()
+_mapped = {}              # kind -> {"file", "mm", "header", "columns"}
+
+
+def _path(name):
+    return os.path.join(SHARED_DIR, name)
+
+
+def _write_json_atomic(name, data):
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    tmp = _path(f"{name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    for _ in range(5):
+        try:
+            os.replace(tmp, _path(name))
+            return
+        except PermissionError:
+            # Windows: file target sedang dibuka proses lain
+            time.sleep(0.01)
+    os.remove(tmp)
+
+
+def _read_json(name):
+    try:
+        with open(_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# PUBLISHER LEASE
+@contextmanager
+def _exclusive(name):
+    """
+    Lock antar proses pada file <name>. Lock OS (msvcrt / fcntl) dilepas
+    otomatis jika proses mati, jadi tidak ada lock basi.
+    """
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    fd = os.open(_path(name), os.O_RDWR | os.O_CREAT)
+    try:
+        if msvcrt:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)   # retry sampai ~10 detik
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if msvcrt:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def acquire_publisher(now=None):
+    """
+    True jika proses ini publisher (lease baru diambil atau diperbarui).
+    Baca-cek-tulis lease dijalankan di bawah lock file, sehingga dua window
+    yang bersamaan menemukan lease habis tidak bisa sama-sama jadi publisher.
+    """
+    now = time.time() if now is None else now
+    pid = os.getpid()
+    try:
+        with _exclusive("leader.lock"):
+            lease = _read_json("leader.json")
+            if lease and lease.get("pid") != pid and now - lease.get("ts", 0) < LEASE_TIMEOUT:
+                return False
+            _write_json_atomic("leader.json", {"pid": pid, "ts": now})
+            return True
+    except OSError as e:
+        print(f"[❌] Gagal mengambil lease publisher: {e}")
+        return False
+
+
+# ENCODING
+def _codes_dtype(n_categories):
+    # sama dengan pilihan pandas, supaya from_codes tidak perlu menyalin kode
+    if n_categories < np.iinfo(np.int8).max:
+        return np.int8
+    if n_categories < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+def _encode_column(values):
+    """
+    Kolom numerik / datetime disimpan apa adanya, kolom lain sebagai kode
+    category + dictionary (kosong / NaN = -1). Categorical dipakai langsung.
+    """
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        codes, dictionary = values.codes, [str(v) for v in values.categories]
+    else:
+        arr = np.asarray(values)
+        if arr.dtype.kind in "biufM":
+            return arr, None
+        # via string: 1 dan "1" jadi satu entry (dictionary harus unik)
+        codes, uniques = pd.factorize(pd.array(arr, dtype="string"))
+        dictionary = list(uniques)
+    return codes.astype(_codes_dtype(len(dictionary)), copy=False), dictionary
+
+
+def publish(kind, columns, meta):
+    """
+    Tulis snapshot kolom ke file baru lalu ganti pointer <kind>.json secara atomik.
+    columns: {nama: list/array}, meta: dict kecil (ts, snapshot_id, feed_down, ...).
+    Gagal tulis hanya dicatat; window ini tetap memakai data hasil fetch-nya.
+    """
+    try:
+        _publish(kind, columns, meta)
+    except OSError as e:
+        print(f"[❌] Gagal menulis shared snapshot {kind}: {e}")
+
+
+def _publish(kind, columns, meta):
+    with _lock:
+        os.makedirs(SHARED_DIR, exist_ok=True)
+        buffers, specs = [], []
+        offset = 0
+        n_rows = 0
+
+        for name, values in columns.items():
+            data, dictionary = _encode_column(values)
+            data = np.ascontiguousarray(data)
+            n_rows = len(data)
+            offset = (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+            specs.append({
+                "name": name,
+                "dtype": data.dtype.str,
+                "offset": offset,
+                "count": len(data),
+                "dictionary": dictionary,
+            })
+            buffers.append((offset, data))
+            offset += data.nbytes
+
+        header = json.dumps({"kind": kind, "rows": n_rows, "meta": meta, "columns": specs}).encode()
+        base = (len(_MAGIC) + 8 + len(header) + _ALIGN - 1) // _ALIGN * _ALIGN
+
+        filename = f"{meta['snapshot_id']}.bin"   # snapshot_id sudah diawali kind
+        tmp = _path(filename + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for off, data in buffers:
+                f.seek(base + off)
+                f.write(data.tobytes())
+            f.truncate(base + max(offset, 1))
+        os.replace(tmp, _path(filename))
+
+        _write_json_atomic(f"{kind}.json", {"file": filename, "meta": meta})
+        _cleanup(kind, keep=filename)
+
+
+def update_meta(kind, **fields):
+    """
+    Perbarui meta di pointer <kind>.json tanpa menulis snapshot baru
+    (mis. feed_down=True saat fetch publisher gagal, data terakhir tetap dipakai).
+    """
+    try:
+        with _lock:
+            pointer = _read_json(f"{kind}.json")
+            if not pointer:
+                return
+            pointer["meta"] = {**pointer["meta"], **fields}
+            _write_json_atomic(f"{kind}.json", pointer)
+    except OSError as e:
+        print(f"[❌] Gagal memperbarui shared snapshot {kind}: {e}")
+
+
+def _cleanup(kind, keep):
+    files = sorted(glob.glob(_path(f"{kind}-*.bin")), key=os.path.getmtime)
+    for f in files[:-KEEP_VERSIONS]:
+        if os.path.basename(f) == keep:
+            continue
+        try:
+            os.remove(f)
+        except OSError:
+            pass   # masih di-map proses lain (Windows), dicoba lagi nanti
+
+
+# READER
+def _map(filename):
+    with open(_path(filename), "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(_MAGIC)] != _MAGIC:
+        mm.close()
+        raise ValueError(f"Bukan file snapshot: {filename}")
+
+    (header_len,) = struct.unpack_from("<Q", mm, len(_MAGIC))
+    start = len(_MAGIC) + 8
+    header = json.loads(mm[start:start + header_len].decode())
+    base = (start + header_len + _ALIGN - 1) // _ALIGN * _ALIGN
+
+    columns = {}
+    for spec in header["columns"]:
+        dtype = np.dtype(spec["dtype"])
+        arr = np.frombuffer(mm, dtype=dtype, count=spec["count"], offset=base + spec["offset"])
+        if spec["dictionary"] is not None:
+            # kode tetap di mmap; hanya dictionary (nilai unik) yang dibuat di proses ini
+            arr = pd.Categorical.from_codes(arr, categories=spec["dictionary"])
+        columns[spec["name"]] = arr
+    return mm, header, columns
+
+
+def read(kind, known_snapshot_id=None):
+    """
+    (meta, columns) snapshot terbaru jika berbeda dari known_snapshot_id,
+    None jika tidak ada yang baru / belum ada publisher. meta diambil dari
+    pointer (lihat update_meta), bukan dari header file.
+    columns: {nama: array numpy (numerik / datetime) atau pd.Categorical (teks)}.
+    """
+    pointer = _read_json(f"{kind}.json")
+    if not pointer:
+        return None
+    meta = pointer["meta"]
+    if meta.get("snapshot_id") == known_snapshot_id:
+        return None
+
+    with _lock:
+        current = _mapped.get(kind)
+        if current is None or current["file"] != pointer["file"]:
+            try:
+                mm, header, columns = _map(pointer["file"])
+            except (OSError, ValueError):
+                return None
+            # mmap lama dibiarkan ditutup oleh GC setelah tidak ada array yang memakainya
+            current = {"file": pointer["file"], "mm": mm, "header": header, "columns": columns}
+            _mapped[kind] = current
+
+    return meta, current["columns"]
+
+
+def read_meta(kind):
+    """Meta pointer <kind>.json saat ini (kondisi feed publisher), None jika belum ada."""
+    pointer = _read_json(f"{kind}.json")
+    return pointer["meta"] if pointer else None
+
+
+def publisher_alive(now=None):
+    now = time.time() if now is None else now
+    lease = _read_json("leader.json")
+    return bool(lease) and now - lease.get("ts", 0) < LEASE_TIMEOUT
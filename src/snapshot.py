@@ -0,0 +1,49 @@
+# src/snapshot.py
+
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Satu versi data feed (DCL / stock) beserta index turunannya.
+    Tidak pernah diubah setelah dibuat: loader membuat Snapshot baru lalu
+    mengganti referensi modul dalam satu assignment, sehingga pembaca selalu
+    melihat data, index, versi dan waktu fetch yang saling cocok tanpa lock.
+    """
+
+    kind: str
+    data: Any
+    ts: float
+    version: int
+    snapshot_id: str
+    indexes: Mapping[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "indexes", MappingProxyType(dict(self.indexes)))
+
+    def index(self, name: str) -> Any:
+        return self.indexes.get(name)
+
+
+# PINNING — satu jawaban memakai satu snapshot per kind dari awal sampai akhir.
+# ContextVar: setiap thread (dan task) punya pin sendiri.
+_pinned: contextvars.ContextVar = contextvars.ContextVar("pinned_snapshots", default=None)
+
+
+@contextmanager
+def pin(*snapshots: Optional[Snapshot]):
+    token = _pinned.set({s.kind: s for s in snapshots if s is not None})
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def pinned(kind: str) -> Optional[Snapshot]:
+    current = _pinned.get()
+    return current.get(kind) if current else None